@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark slot start parsing + UTC->local conversion: strptime + parse_utc_to_local (uncached tz lookup,
+as before) vs utils.date.parse_slot_start and the memoized slot_start_local, over a realistic window.
+Run: python scripts/bench_date.py [--courts 8] [--days 21] [--repeat 5]
+"""
+import argparse
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+import pytz
+import tzlocal
+
+# Add project root to path
+sys.path.insert(0, ".")
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def slot_keys(courts: int, days: int) -> list:
+    """(start_date, start_time) of every slot the reserver sees: per court and day, one every 30 min 07:00-22:30."""
+    first = datetime(2026, 3, 1)
+    return [
+        ((first + timedelta(days=d)).strftime("%Y-%m-%d"), f"{h:02d}:{m:02d}:00")
+        for d in range(days)
+        for _ in range(courts)
+        for h in range(7, 23)
+        for m in (0, 30)
+    ]
+
+
+def legacy(start_date: str, start_time: str) -> datetime:
+    """The per-slot path before the date engine: strptime, then a fresh tzlocal + pytz lookup."""
+    utc = datetime.strptime(f"{start_date} {start_time}", DATE_FORMAT).replace(tzinfo=pytz.UTC)
+    return utc.astimezone(pytz.timezone(tzlocal.get_localzone_name()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--courts", type=int, default=8)
+    parser.add_argument("--days", type=int, default=21)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from src.utils import date
+
+    keys = slot_keys(args.courts, args.days)
+    print(f"{args.days} days x {args.courts} courts, {len(keys)} slots; best of {args.repeat}")
+
+    def parse_only(keys: list) -> list:
+        return [date.parse_utc_to_local(date.parse_slot_start(d, t)) for d, t in keys]
+
+    def memoized_per_run(keys: list) -> list:
+        # Fresh cache each time: what one run pays (courts on the same day share a key)
+        date.slot_start_local.cache_clear()
+        return [date.slot_start_local(d, t) for d, t in keys]
+
+    candidates = {
+        "strptime + parse_utc_to_local (before)": lambda keys: [legacy(d, t) for d, t in keys],
+        "parse_slot_start + cached tz": parse_only,
+        "slot_start_local (cache cleared per run)": memoized_per_run,
+        "slot_start_local (warm cache)": lambda keys: [date.slot_start_local(d, t) for d, t in keys],
+    }
+    expected = [legacy(d, t) for d, t in keys]
+    results = {}
+    for label, convert in candidates.items():
+        assert convert(keys) == expected, f"{label} converted differently"
+        best = min(timeit.repeat(lambda: convert(keys), number=5, repeat=args.repeat)) / 5
+        results[label] = best
+
+    baseline = results["strptime + parse_utc_to_local (before)"]
+    for label, secs in results.items():
+        print(f"  {label:<40} {secs * 1e6 / len(keys):7.2f} us per slot   x{baseline / secs:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSON decoding of realistic availability payloads: response.json() (stdlib) vs utils.json_codec backends.
+Run: python scripts/bench_json_decode.py [--courts 8] [--days 21] [--repeat 5]
+"""
+import argparse
+import json
+import sys
+import timeit
+import uuid
+
+# Add project root to path
+sys.path.insert(0, ".")
+
+
+def availability_payload(courts: int, day: str) -> bytes:
+    """One day of /api/clubs/availability: per court, a slot every 30 min 07:00-22:30 in 60/90/120 min."""
+    entries = []
+    for _ in range(courts):
+        slots = [
+            {"start_time": f"{h:02d}:{m:02d}:00", "duration": d, "price": f"{d // 30 * 8} EUR"}
+            for h in range(7, 23)
+            for m in (0, 30)
+            for d in (60, 90, 120)
+        ]
+        entries.append({"resource_id": str(uuid.uuid4()), "start_date": day, "slots": slots})
+    return json.dumps(entries).encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--courts", type=int, default=8)
+    parser.add_argument("--days", type=int, default=21)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    from src.utils import json_codec
+
+    payloads = [availability_payload(args.courts, f"2026-03-{d + 1:02d}") for d in range(args.days)]
+    size_kb = sum(len(p) for p in payloads) / 1024
+    print(f"{args.days} days x {args.courts} courts, {size_kb:.0f} KiB total; best of {args.repeat}")
+
+    # What response.json() does for a UTF-8 body: decode bytes to str, then stdlib json.loads
+    candidates = {"response.json() (stdlib)": lambda p: json.loads(p.decode("utf-8"))}
+    for name in sorted(json_codec.DECODERS):
+        candidates[f"json_codec[{name}]"] = json_codec.get_decoder(name)
+
+    expected = [json.loads(p) for p in payloads]
+    results = {}
+    for label, decode in candidates.items():
+        assert [decode(p) for p in payloads] == expected, f"{label} decoded differently"
+        best = min(timeit.repeat(lambda: [decode(p) for p in payloads], number=10, repeat=args.repeat)) / 10
+        results[label] = best
+
+    baseline = results["response.json() (stdlib)"]
+    for label, secs in results.items():
+        print(f"  {label:<28} {secs * 1000:8.2f} ms per window   x{baseline / secs:5.2f}")
+    print(f"Default backend: {json_codec.BACKEND}")
+
+
+if __name__ == "__main__":
+    main()
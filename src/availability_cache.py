@@ -0,0 +1,120 @@
+"""
+TTL + LRU cache of availability responses keyed by (tenant_id, day), shared by all accounts of a run.
+Release-aware: the day that opens at booking_release_time is never served from cache (one release day per
+booking_days_ahead in use: accounts can override it).
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date as date_type, datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from .utils.json_file import read_json_dict, write_private_json
+
+logger = logging.getLogger(__name__)
+
+AVAILABILITY_CACHE_FILE_NAME = "availability.json"
+
+Day = Union[date_type, datetime]
+
+
+def _day_str(day: Day) -> str:
+    return day.strftime("%Y-%m-%d")
+
+
+class AvailabilityCache:
+    """Thread-safe LRU of (tenant_id, YYYY-MM-DD) -> (expires_at, entries), with optional JSON persistence."""
+
+    def __init__(
+        self,
+        default_ttl: float = 60.0,
+        max_entries: int = 512,
+        release_day: Optional[Day] = None,
+        path: Optional[Path] = None,
+    ) -> None:
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.release_days: Set[str] = {_day_str(release_day)} if release_day is not None else set()
+        self.path = Path(path) if path is not None else None
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.path is not None:
+            self._load()
+
+    def _cacheable(self, day_key: str) -> bool:
+        # Slots for a newly released day change by the second: always fetch it
+        return day_key not in self.release_days
+
+    def add_release_day(self, day: Day) -> None:
+        """Never serve day from cache (and drop what is cached for it, e.g. loaded from disk)."""
+        day_key = _day_str(day)
+        with self._lock:
+            self.release_days.add(day_key)
+            for key in [k for k in self._entries if k[1] == day_key]:
+                del self._entries[key]
+
+    def get(self, tenant_id: str, day: Day) -> Optional[List[Dict[str, Any]]]:
+        """Cached entries for this tenant/day, or None if absent, expired or the release day."""
+        day_key = _day_str(day)
+        if not self._cacheable(day_key):
+            return None
+        key = (tenant_id, day_key)
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or item[0] <= time.time():
+                if item is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(
+        self,
+        tenant_id: str,
+        day: Day,
+        entries: List[Dict[str, Any]],
+        ttl: Optional[float] = None,
+    ) -> None:
+        """Store entries for ttl seconds (default_ttl if None); the release day and ttl <= 0 are not stored."""
+        day_key = _day_str(day)
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0 or not self._cacheable(day_key):
+            return
+        key = (tenant_id, day_key)
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, entries)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load(self) -> None:
+        now = time.time()
+        for raw_key, item in read_json_dict(self.path).items():
+            tenant_id, _, day_key = raw_key.rpartition("|")
+            expires_at, entries = item.get("expires_at", 0), item.get("entries")
+            if expires_at > now and isinstance(entries, list) and self._cacheable(day_key):
+                self._entries[(tenant_id, day_key)] = (expires_at, entries)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def save(self) -> None:
+        """Write unexpired entries to path (no-op without persistence)."""
+        if self.path is None:
+            return
+        now = time.time()
+        with self._lock:
+            data = {
+                f"{tenant_id}|{day_key}": {"expires_at": expires_at, "entries": entries}
+                for (tenant_id, day_key), (expires_at, entries) in self._entries.items()
+                if expires_at > now
+            }
+        try:
+            write_private_json(self.path, data)
+        except OSError as e:
+            logger.warning("Could not write availability cache %s: %s", self.path, e)
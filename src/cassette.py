@@ -0,0 +1,239 @@
+"""
+Record/replay of HTTP traffic for offline benchmarking. In record mode every request a client sends
+(and its response, status, headers and elapsed time) is appended to a cassette file; in replay mode
+the cassette answers instead of the network, optionally sleeping for the recorded latency, so
+run_booking and Reserver.process_tenant can be profiled without credentials or Playtomic.
+Credentials, Authorization/Cookie headers, cookie values and tokens are redacted when recording.
+"""
+import base64
+import io
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .config import CassetteConfig
+from .utils.json_file import read_json_dict, write_private_json
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+REDACTED = "REDACTED"
+# Request headers that are never written to a cassette
+SECRET_REQUEST_HEADERS = {"authorization", "cookie"}
+# JSON keys whose values are replaced in request and response bodies
+SECRET_BODY_KEYS = {"email", "password", "access_token", "token", "refresh_token", "id_token"}
+
+
+class CassetteMiss(requests.ConnectionError):
+    """Replay got a request the cassette has no recording for."""
+
+
+def _redact_json(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: (REDACTED if k in SECRET_BODY_KEYS else _redact_json(v)) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact_json(v) for v in value]
+    return value
+
+
+def _encode_body(body: Optional[bytes]) -> Dict[str, Any]:
+    """Body as JSON-safe data: redacted JSON when it parses, text when UTF-8, else base64."""
+    if not body:
+        return {"text": ""}
+    try:
+        return {"json": _redact_json(json.loads(body))}
+    except ValueError:
+        pass
+    try:
+        return {"text": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(body).decode("ascii")}
+
+
+def _decode_body(data: Dict[str, Any]) -> bytes:
+    if "json" in data:
+        return json.dumps(data["json"]).encode("utf-8")
+    if "base64" in data:
+        return base64.b64decode(data["base64"])
+    return (data.get("text") or "").encode("utf-8")
+
+
+def _request_body(request: requests.PreparedRequest) -> Optional[bytes]:
+    body = request.body
+    if isinstance(body, str):
+        return body.encode("utf-8")
+    return body if isinstance(body, bytes) else None
+
+
+class Cassette:
+    """Ordered list of recorded interactions, loaded from / saved to a JSON file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.interactions: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._replay: Optional["ReplayAdapter"] = None
+
+    @classmethod
+    def load(cls, path: Path) -> "Cassette":
+        cassette = cls(path)
+        data = read_json_dict(cassette.path)
+        if data.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"{path} is not a version {CASSETTE_VERSION} cassette")
+        cassette.interactions = list(data.get("interactions") or [])
+        return cassette
+
+    def add(self, interaction: Dict[str, Any]) -> None:
+        with self._lock:
+            self.interactions.append(interaction)
+
+    def replay_adapter(self, config: CassetteConfig) -> "ReplayAdapter":
+        """One ReplayAdapter per cassette, shared by all clients so recordings are used up in order."""
+        with self._lock:
+            if self._replay is None:
+                self._replay = ReplayAdapter(self, config.emulate_latency, config.latency_scale)
+            return self._replay
+
+    def save(self) -> None:
+        with self._lock:
+            data = {"version": CASSETTE_VERSION, "recorded_at": time.time(), "interactions": list(self.interactions)}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            write_private_json(self.path, data)
+        except OSError as e:
+            logger.warning("Could not write cassette %s: %s", self.path, e)
+            return
+        logger.info("Wrote %d recorded requests to %s", len(data["interactions"]), self.path)
+
+
+class RecordingAdapter(BaseAdapter):
+    """Wraps a real adapter and appends every exchange (redacted) to a cassette."""
+
+    def __init__(self, inner: BaseAdapter, cassette: Cassette) -> None:
+        super().__init__()
+        self.inner = inner
+        self.cassette = cassette
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        started = time.monotonic()
+        response = self.inner.send(request, **kwargs)
+        content = response.content  # read streamed bodies too; iter_content then serves the buffered copy
+        headers = dict(response.headers)
+        if "Set-Cookie" in response.headers:
+            # Cookie names only: the values are session credentials
+            headers = {k: v for k, v in headers.items() if k.lower() != "set-cookie"}
+            names = [c.name for c in response.cookies]
+            if names:
+                headers["Set-Cookie"] = ", ".join(f"{name}={REDACTED}" for name in names)
+        self.cassette.add({
+            "method": request.method,
+            "url": request.url,
+            "request_headers": {
+                k: v for k, v in request.headers.items() if k.lower() not in SECRET_REQUEST_HEADERS
+            },
+            "request_body": _encode_body(_request_body(request)),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": headers,
+            "body": _encode_body(content),
+            "elapsed": time.monotonic() - started,
+        })
+        return response
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+def build_response(request: requests.PreparedRequest, interaction: Dict[str, Any]) -> requests.Response:
+    """requests.Response for a recorded interaction (body already loaded, streaming works from memory)."""
+    content = _decode_body(interaction.get("body") or {})
+    response = requests.Response()
+    response.status_code = interaction["status"]
+    response.reason = interaction.get("reason") or ""
+    response.headers = CaseInsensitiveDict(interaction.get("headers") or {})
+    response.headers.pop("Content-Encoding", None)  # body is stored decoded
+    response.headers["Content-Length"] = str(len(content))
+    response._content = content
+    response._content_consumed = True
+    response.raw = io.BytesIO(content)
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.url = request.url or ""
+    response.request = request
+    return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Serves requests from a cassette. A request is matched to the next unused recording with the same
+    method and URL; failing that (e.g. availability for other dates when replaying on a later day), to the
+    next with the same method, host and path. The last recording of a key is reused once the others are spent.
+    """
+
+    def __init__(self, cassette: Cassette, emulate_latency: bool = False, latency_scale: float = 1.0) -> None:
+        super().__init__()
+        self.emulate_latency = emulate_latency
+        self.latency_scale = latency_scale
+        self._exact: Dict[Tuple[str, str], Deque[Dict[str, Any]]] = defaultdict(deque)
+        self._loose: Dict[Tuple[str, str, str], Deque[Dict[str, Any]]] = defaultdict(deque)
+        for interaction in cassette.interactions:
+            self._exact[(interaction["method"], interaction["url"])].append(interaction)
+            self._loose[self._loose_key(interaction["method"], interaction["url"])].append(interaction)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _loose_key(method: str, url: str) -> Tuple[str, str, str]:
+        parts = urlsplit(url)
+        return method, parts.hostname or "", parts.path
+
+    @staticmethod
+    def _take(queue: Deque[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not queue:
+            return None
+        return queue.popleft() if len(queue) > 1 else queue[0]
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        method, url = request.method or "GET", request.url or ""
+        with self._lock:
+            interaction = self._take(self._exact.get((method, url), deque()))
+            if interaction is None:
+                interaction = self._take(self._loose.get(self._loose_key(method, url), deque()))
+        if interaction is None:
+            raise CassetteMiss(f"No recorded response for {method} {url}", request=request)
+        if self.emulate_latency:
+            time.sleep(interaction.get("elapsed", 0.0) * self.latency_scale)
+        return build_response(request, interaction)
+
+    def close(self) -> None:
+        pass
+
+
+def attach(session: requests.Session, cassette: Cassette, config: CassetteConfig) -> None:
+    """Route a session through the cassette: wrap its adapters (record) or replace them (replay)."""
+    if config.mode == "record":
+        for prefix, adapter in list(session.adapters.items()):
+            session.mount(prefix, RecordingAdapter(adapter, cassette))
+    elif config.mode == "replay":
+        session.adapters.clear()
+        replay = cassette.replay_adapter(config)
+        session.mount("https://", replay)
+        session.mount("http://", replay)
+
+
+def open_cassette(config: CassetteConfig) -> Optional[Cassette]:
+    """Cassette for this run: empty for record, loaded for replay, None when off."""
+    if config.mode == "record":
+        return Cassette(Path(config.path))
+    if config.mode == "replay":
+        cassette = Cassette.load(Path(config.path))
+        logger.info("Replaying %d recorded requests from %s", len(cassette.interactions), config.path)
+        return cassette
+    return None
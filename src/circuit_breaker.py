@@ -0,0 +1,83 @@
+"""
+Circuit breaker per payment base URL. A backend that keeps failing (HTML instead of JSON, 403,
+5xx, connection errors) is skipped by _payment_base_url until reset_seconds have passed; then one
+probe is let through (half-open) and its outcome closes or re-opens the circuit; while that probe
+is out, everyone else sees the circuit as open.
+"""
+import threading
+import time
+from typing import Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures (or one hard failure); probes again after `reset_seconds`."""
+
+    def __init__(self, failure_threshold: int = 3, reset_seconds: float = 30.0) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        # Half-open: the single probe request has been handed out and has not reported back yet
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _current_state(self) -> str:
+        # Caller holds the lock
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+            self._state = HALF_OPEN
+            self._probing = False
+        return self._state
+
+    @property
+    def state(self) -> str:
+        """Current state; an open circuit whose reset time has passed reads as half-open."""
+        with self._lock:
+            return self._current_state()
+
+    def available(self) -> bool:
+        """True if a request may go to this backend (closed, or half-open with the probe not taken). No side effects."""
+        with self._lock:
+            state = self._current_state()
+            return state == CLOSED or (state == HALF_OPEN and not self._probing)
+
+    def admit(self) -> Optional[str]:
+        """
+        Let one request through: returns the state it was admitted in, or None if refused. Half-open
+        admits only the probe; release_probe() (or a record_*) must follow so the circuit can move on.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == HALF_OPEN:
+                if self._probing:
+                    return None
+                self._probing = True
+            return state if state != OPEN else None
+
+    def release_probe(self) -> None:
+        """The probe ended without saying anything about the backend; the next caller may probe."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self, hard: bool = False) -> bool:
+        """Count a failure; hard failures (the backend answered but is unusable for us) open at once.
+        Returns True if this failure opened the circuit."""
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or hard or self._failures >= self.failure_threshold:
+                was_open = self._state == OPEN
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                return not was_open
+            return False
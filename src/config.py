@@ -1,7 +1,7 @@
 """Configuration loading from YAML and environment."""
 import os
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Literal, Optional, Tuple
 
 import yaml
 from dotenv import load_dotenv
@@ -16,6 +16,9 @@ class TenantConfig(BaseModel):
     """One venue/club to book at."""
     id: str = Field(..., description="Playtomic tenant_id (venue ID)")
     name: str = Field("", description="Display name for logs")
+    # Venue-specific start times/windows; override the global target_hours / weekday_hours for this venue
+    target_hours: Optional[List[str]] = Field(None, description="Start times or windows at this venue (e.g. '19:00-21:00')")
+    weekday_hours: Dict[int, List[str]] = Field(default_factory=dict, description="Per weekday (0=Mon) start times at this venue")
 
 
 class AccountConfig(BaseModel):
@@ -31,13 +34,84 @@ class AccountConfig(BaseModel):
     booking_days_ahead: Optional[int] = Field(None, description="Search window in days (e.g. 14 = today..today+14 when start is 0)")
 
 
+class TransportConfig(BaseModel):
+    """HTTP connection pooling, socket options and timeouts for every PlaytomicClient session."""
+    pool_connections: int = Field(10, ge=1, description="Number of per-host connection pools to keep")
+    pool_maxsize: int = Field(10, ge=1, description="Connections kept open per host")
+    pool_block: bool = Field(False, description="Wait for a free pooled connection instead of opening a throwaway one")
+    host_pool_maxsize: Dict[str, int] = Field(
+        default_factory=dict,
+        description="Per-host pool size overrides, e.g. {'playtomic.com': 32}",
+    )
+    http2_hosts: List[str] = Field(
+        default_factory=list,
+        description="Hosts to reach over HTTP/2, one multiplexed connection each ('*' = all https hosts); "
+        "hosts that do not negotiate h2 fall back to HTTP/1.1. Needs httpx[http2]",
+    )
+    tcp_nodelay: bool = Field(True, description="Disable Nagle's algorithm (send small requests immediately)")
+    tcp_keepalive: bool = Field(True, description="Enable TCP keepalive probes on pooled sockets")
+    keepalive_idle_seconds: int = Field(30, ge=1, description="Idle time before the first keepalive probe")
+    keepalive_interval_seconds: int = Field(10, ge=1, description="Time between keepalive probes")
+    keepalive_count: int = Field(3, ge=1, description="Unanswered probes before the socket is dropped")
+    connect_timeout: float = Field(10.0, gt=0, description="Default connect timeout (seconds)")
+    read_timeout: float = Field(10.0, gt=0, description="Default read timeout (seconds)")
+    timeouts: Dict[str, Tuple[float, float]] = Field(
+        default_factory=lambda: {"login": (15.0, 15.0), "io_login": (15.0, 15.0), "keepalive": (5.0, 5.0)},
+        description="(connect, read) timeouts per endpoint name (login, availability, create_intent, confirm, ...)",
+    )
+
+    def timeout_for(self, endpoint: str) -> Tuple[float, float]:
+        return self.timeouts.get(endpoint, (self.connect_timeout, self.read_timeout))
+
+
+class RateLimit(BaseModel):
+    """Token bucket: sustained requests per second plus a burst allowance."""
+    rate: float = Field(..., gt=0, description="Requests per second")
+    burst: float = Field(1.0, ge=1.0, description="Requests allowed at once before throttling")
+
+
+class RateLimitConfig(BaseModel):
+    """Process-wide rate limits shared by all accounts and tenants."""
+    enabled: bool = Field(False, description="Throttle requests with the buckets below")
+    hosts: Dict[str, RateLimit] = Field(default_factory=dict, description="Per host, e.g. {'playtomic.com': {rate: 20, burst: 20}}")
+    endpoints: Dict[str, RateLimit] = Field(default_factory=dict, description="Per endpoint name (availability, create_intent, ...)")
+
+
+class RetryPolicy(BaseModel):
+    """How one endpoint retries inside the client: exponential backoff with jitter, Retry-After aware."""
+    max_attempts: int = Field(3, ge=1, description="Total tries including the first")
+    base_delay: float = Field(0.1, ge=0, description="Backoff before the 2nd try; doubles each retry")
+    max_delay: float = Field(1.0, ge=0, description="Cap on the backoff delay")
+    jitter: float = Field(0.5, ge=0, le=1, description="Random fraction of the delay to shave off (0 = none, 1 = full jitter)")
+    retry_statuses: List[int] = Field(default_factory=lambda: [429, 500, 502, 503, 504])
+    retry_read_errors: bool = Field(True, description="Retry timeouts/dropped connections after the request was sent (idempotent calls only)")
+    honor_retry_after: bool = Field(True, description="Wait as long as a 429/503 Retry-After header asks")
+    max_retry_after: float = Field(3.0, ge=0, description="Give up instead of waiting longer than this for Retry-After")
+
+
+class RetryConfig(BaseModel):
+    """Per-endpoint retry policies; entries here override the built-in ones in src/retry.py."""
+    enabled: bool = Field(True, description="Retry failed requests inside the client")
+    policies: Dict[str, RetryPolicy] = Field(default_factory=dict, description="Overrides per endpoint name")
+
+
+class CassetteConfig(BaseModel):
+    """Record all HTTP traffic of a run to a file, or replay such a file instead of the network (src/cassette.py)."""
+    mode: Literal["off", "record", "replay"] = Field("off", description="off | record | replay")
+    path: str = Field(".cache/cassette.json", description="Cassette file to write (record) or read (replay)")
+    emulate_latency: bool = Field(False, description="Replay: sleep for each request's recorded time")
+    latency_scale: float = Field(1.0, ge=0, description="Replay: multiply recorded times by this")
+
+
 class BookingConfig(BaseModel):
     """Booking preferences from config file."""
-    # Target time slots as HH:MM (e.g. 18:00, 18:30, ..., 21:30)
+    # Target time slots as HH:MM (e.g. 18:00, 18:30, ..., 21:30) or windows of start times (e.g. 18:00-21:30)
     target_hours: List[str] = Field(
         default_factory=lambda: ["18:00", "18:30", "19:00", "19:30", "20:00", "20:30", "21:00", "21:30"],
         description="Preferred start times",
     )
+    # Different start times on some weekdays (e.g. {5: ["10:00-13:00"]} for Saturday mornings); others use target_hours
+    weekday_hours: Dict[int, List[str]] = Field(default_factory=dict, description="Per weekday (0=Mon) start times")
     # Weekdays only: 0=Mon, 4=Fri
     weekdays_only: bool = True
     target_weekdays: List[int] = Field(
@@ -59,6 +133,55 @@ class BookingConfig(BaseModel):
     booking_release_time: Optional[str] = Field(None, description="HH:MM when slots open (local or use timezone below)")
     # Timezone for release time (e.g. Europe/Brussels for CET). Required on GitHub Actions (runner is UTC).
     booking_release_timezone: Optional[str] = Field(None, description="IANA timezone for booking_release_time, e.g. Europe/Brussels")
+    # Fetch the days of the search window concurrently (1 = one day at a time, as before)
+    availability_workers: int = Field(1, ge=1, le=21, description="Max concurrent per-day availability requests")
+    # Connection pools, socket options and timeouts (see TransportConfig)
+    transport: TransportConfig = Field(default_factory=TransportConfig)
+    # Token-bucket throttling per host / endpoint, shared by all accounts (see RateLimitConfig)
+    rate_limits: RateLimitConfig = Field(default_factory=RateLimitConfig)
+    # Immediate per-request retries (backoff + jitter, Retry-After); see RetryConfig and src/retry.py
+    retry: RetryConfig = Field(default_factory=RetryConfig)
+    # Hedged availability requests: if a request is slower than the given percentile of recent ones, send a duplicate
+    hedge_availability: bool = Field(False, description="Duplicate slow availability requests and use the first answer")
+    hedge_percentile: float = Field(95.0, ge=50.0, le=99.9, description="Latency percentile after which to hedge")
+    hedge_initial_delay_seconds: float = Field(0.5, gt=0, description="Hedge delay until enough latency samples exist")
+    # Cache availability per (venue, day) within a run (the day being released is always re-fetched)
+    availability_cache_ttl_seconds: float = Field(60.0, ge=0, description="Reuse a day's availability this long (0 = off)")
+    availability_cache_max_entries: int = Field(512, ge=1, description="Max cached (venue, day) responses")
+    availability_cache_persist: bool = Field(False, description="Also keep the cache in .cache/availability.json across runs")
+    # While waiting for booking_release_time: keep connections to all Playtomic hosts open (HEAD every N seconds)
+    warmup_connections: bool = Field(False, description="Warm up and keep alive connections before release")
+    warmup_keepalive_seconds: float = Field(15.0, ge=1.0, le=120.0, description="Seconds between keep-alive requests")
+    # Remember per account which payment backend returned a JSON intent; used first in the release window
+    remember_payment_backend: bool = Field(False, description="Go straight to the last working payment backend at release")
+    # Circuit breaker per payment backend: skip one that keeps failing, probe it again after the reset time
+    payment_breaker_failures: int = Field(3, ge=1, description="Consecutive failures that open a backend's circuit (HTML/403 open it at once)")
+    payment_breaker_reset_seconds: float = Field(30.0, gt=0, description="Seconds before an open backend is probed again")
+    # Send requests for a Playtomic origin elsewhere, e.g. {"https://playtomic.com": "http://127.0.0.1:8765"} (src/standin_server.py)
+    base_url_overrides: Dict[str, str] = Field(default_factory=dict, description="Origin -> replacement origin")
+    # Offline benchmarking: record a run's HTTP traffic, or replay it (no network, credentials or notifications)
+    cassette: CassetteConfig = Field(default_factory=CassetteConfig)
+    # Per-request timings: summary is logged at the end of every run; set a path to also write them as JSON
+    request_timings_file: Optional[str] = Field(None, description="Write per-endpoint histograms and request events here after a run")
+    # Create payment intents for this many top-ranked slots of a day at once and confirm the best that succeeds (1 = one at a time)
+    speculative_intents: int = Field(1, ge=1, le=8, description="Concurrent payment intents per booking round")
+    # Before release, pre-build and serialize the payment intent body of every candidate slot on the release day
+    intent_templates: bool = Field(False, description="Pre-build payment intents so booking is a lookup and a send")
+    # app.playtomic.com /payments warm-up: once before release (default), alongside each intent POST, awaited before it, or off
+    payment_warmup: Literal["prerelease", "concurrent", "inline", "off"] = Field("prerelease", description="When to load the payments page")
+    # Resolve every host once before release and pin the answers for the run (patches socket.getaddrinfo
+    # process-wide while the run lasts, so it is opt-in)
+    dns_cache: bool = Field(False, description="Cache and pre-resolve DNS for all Playtomic hosts")
+    dns_ttl_seconds: float = Field(600.0, gt=0, description="How long a resolved address is reused")
+    # Renew web and playtomic.io logins in a background thread before they expire (or right after a 401)
+    token_refresh: bool = Field(False, description="Refresh credentials in the background instead of on the hot path")
+    token_refresh_lead_seconds: float = Field(300.0, ge=0, description="Log in again this long before credentials expire")
+    # Reuse logins across runs (cookies/tokens written to .cache/sessions.json); log in again once stale
+    session_cache: bool = Field(False, description="Restore cached sessions instead of logging in every run")
+    # A cached session lasts until its tokens/cookies expire; set a cap here to log in more often
+    session_cache_ttl_minutes: Optional[int] = Field(None, ge=1, description="Max age of a cached session (default: credential expiry)")
+    # Parse each day's availability while it downloads and start matching on the first complete court
+    stream_availability: bool = Field(False, description="Stream availability responses (used when availability_workers is 1)")
     # Multiple accounts: each books on its target_weekdays. If empty, use single PLAYTOMIC_EMAIL/PASSWORD.
     accounts: List[AccountConfig] = Field(default_factory=list, description="Multiple accounts with per-account weekdays")
 
@@ -0,0 +1,220 @@
+"""
+HTTP/2 transport for PlaytomicClient sessions: a requests adapter that sends through httpx with h2
+enabled, so parallel availability and payment calls to one host share a single multiplexed connection
+instead of one TCP+TLS connection each. Mounted per host from TransportConfig.http2_hosts; a host that
+does not negotiate h2 over ALPN (or plain http:// URLs) is served over HTTP/1.1 by the same adapter.
+Needs httpx with the http2 extra (pip install 'httpx[http2]'); without it the sessions stay on HTTP/1.1.
+verify, cert and proxies are honoured as by requests' own adapter (one httpx transport per combination).
+"""
+import logging
+import os
+import ssl
+import threading
+from http.client import HTTPMessage
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.cookies import extract_cookies_to_jar
+from requests.structures import CaseInsensitiveDict
+from requests.utils import DEFAULT_CA_BUNDLE_PATH, get_encoding_from_headers, select_proxy
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional dependency
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# Connection-specific headers that HTTP/2 forbids (httpx manages the connection itself)
+HOP_BY_HOP_HEADERS = {"connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade"}
+
+Timeout = Union[None, float, Tuple[Optional[float], Optional[float]]]
+# (verify, cert, proxy URL) a transport was built for
+TransportKey = Tuple[Any, Any, Optional[str]]
+
+
+class ConnectFailed(requests.ConnectionError):
+    """The HTTP/2 adapter could not open a connection (the request was never sent)."""
+
+
+class _Body:
+    """
+    File-like response body for requests: read() pulls decoded chunks from the httpx stream, so
+    stream=True and iter_content keep working. Also exposes the headers the way requests' cookie
+    extraction expects them from urllib3 (raw._original_response.msg).
+    """
+
+    def __init__(self, response: "httpx.Response", headers: HTTPMessage) -> None:
+        self._response = response
+        self._chunks: Iterator[bytes] = response.iter_bytes()
+        self._buffer = b""
+        self._original_response = SimpleNamespace(msg=headers)
+
+    def read(self, size: int = -1) -> bytes:
+        try:
+            while size < 0 or len(self._buffer) < size:
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    break
+                self._buffer += chunk
+        except httpx.TimeoutException as e:
+            raise requests.ConnectionError(e) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ChunkedEncodingError(e) from e
+        if size < 0:
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def close(self) -> None:
+        self._response.close()
+
+
+def _timeout_extension(timeout: Timeout) -> Dict[str, Optional[float]]:
+    """requests timeout (seconds or (connect, read)) as an httpcore timeout extension."""
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+    else:
+        connect = read = timeout
+    return {"connect": connect, "read": read, "write": read, "pool": connect}
+
+
+def _ssl_verify(verify: Any, cert: Any) -> Union[bool, ssl.SSLContext]:
+    """requests' verify (bool or CA bundle/directory path) and cert (path or (cert, key)) for httpx."""
+    if not cert and isinstance(verify, bool):
+        return verify
+    if verify is False:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    else:
+        ca = DEFAULT_CA_BUNDLE_PATH if verify is True else verify
+        if os.path.isdir(ca):
+            context = ssl.create_default_context(capath=ca)
+        else:
+            context = ssl.create_default_context(cafile=ca)
+    if cert:
+        if isinstance(cert, str):
+            context.load_cert_chain(cert)
+        else:
+            context.load_cert_chain(*cert)
+    return context
+
+
+class Http2Adapter(BaseAdapter):
+    """requests adapter backed by an httpx transport with HTTP/2 enabled (HTTP/1.1 when h2 is not negotiated)."""
+
+    def __init__(
+        self,
+        socket_options: Optional[List[Tuple[int, int, int]]] = None,
+        max_connections: int = 100,
+    ) -> None:
+        if httpx is None:
+            raise RuntimeError("Http2Adapter needs httpx: pip install 'httpx[http2]'")
+        super().__init__()
+        self._socket_options = socket_options
+        self._max_connections = max_connections
+        self._transports: Dict[TransportKey, "httpx.HTTPTransport"] = {}
+        # host -> negotiated protocol ("HTTP/2" or "HTTP/1.1"), logged the first time per host
+        self.protocols: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        # Default transport up front: raises ImportError when the h2 package is missing
+        self._transport_for(True, None, None)
+
+    def _transport_for(self, verify: Any, cert: Any, proxy: Optional[str]) -> "httpx.HTTPTransport":
+        """The transport for this verify/cert/proxy combination, built on first use."""
+        key = (verify, cert, proxy)
+        with self._lock:
+            transport = self._transports.get(key)
+            if transport is None:
+                # requests has already applied the environment (REQUESTS_CA_BUNDLE, *_PROXY, NO_PROXY)
+                transport = httpx.HTTPTransport(
+                    verify=_ssl_verify(verify, cert),
+                    trust_env=False,
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_connections=self._max_connections, max_keepalive_connections=self._max_connections
+                    ),
+                    proxy=proxy,
+                    socket_options=self._socket_options,
+                )
+                self._transports[key] = transport
+            return transport
+
+    def send(
+        self,
+        request: requests.PreparedRequest,
+        stream: bool = False,
+        timeout: Timeout = None,
+        verify: Any = True,
+        cert: Any = None,
+        proxies: Any = None,
+    ) -> requests.Response:
+        try:
+            transport = self._transport_for(verify, cert, select_proxy(request.url or "", proxies))
+        except (ImportError, ValueError) as e:
+            # A proxy URL httpx cannot use (e.g. socks without the socksio package)
+            raise requests.exceptions.InvalidProxyURL(e, request=request) from e
+        headers = [(k, v) for k, v in request.headers.items() if k.lower() not in HOP_BY_HOP_HEADERS]
+        body = request.body.encode("utf-8") if isinstance(request.body, str) else request.body
+        h2_request = httpx.Request(
+            request.method or "GET",
+            request.url or "",
+            headers=headers,
+            content=body,
+            extensions={"timeout": _timeout_extension(timeout)},
+        )
+        try:
+            h2_response = transport.handle_request(h2_request)
+        except httpx.ConnectTimeout as e:
+            raise requests.ConnectTimeout(e, request=request) from e
+        except httpx.ConnectError as e:
+            raise ConnectFailed(e, request=request) from e
+        except httpx.TimeoutException as e:
+            raise requests.ReadTimeout(e, request=request) from e
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(e, request=request) from e
+        h2_response.request = h2_request
+        self._note_protocol(request.url or "", h2_response.http_version)
+        return self._build_response(request, h2_response)
+
+    def _note_protocol(self, url: str, protocol: str) -> None:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if self.protocols.get(host) == protocol:
+                return
+            self.protocols[host] = protocol
+        if protocol == "HTTP/2":
+            logger.debug("%s: using HTTP/2", host)
+        else:
+            logger.info("%s did not negotiate HTTP/2; using %s", host, protocol)
+
+    def _build_response(self, request: requests.PreparedRequest, h2_response: "httpx.Response") -> requests.Response:
+        message = HTTPMessage()
+        for key, value in h2_response.headers.multi_items():
+            message[key] = value
+        response = requests.Response()
+        response.status_code = h2_response.status_code
+        response.reason = h2_response.reason_phrase
+        response.headers = CaseInsensitiveDict(h2_response.headers)
+        if "Content-Encoding" in response.headers:
+            # httpx decodes the body, so the encoded length no longer applies either
+            response.headers.pop("Content-Encoding")
+            response.headers.pop("Content-Length", None)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = _Body(h2_response, message)
+        response.url = request.url or ""
+        response.request = request
+        response.connection = self
+        extract_cookies_to_jar(response.cookies, request, response.raw)
+        return response
+
+    def close(self) -> None:
+        with self._lock:
+            transports, self._transports = list(self._transports.values()), {}
+        for transport in transports:
+            transport.close()
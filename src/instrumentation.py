@@ -0,0 +1,199 @@
+"""
+Per-request instrumentation for PlaytomicClient: every HTTP call becomes a RequestEvent (endpoint,
+host, status, bytes, wall time, tags). Events feed in-memory latency histograms per endpoint and any
+subscribed callbacks; run_booking logs (and optionally writes) the summary at the end of a run.
+"""
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from .utils.json_file import write_private_json
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in milliseconds (last bucket is open-ended)
+BUCKET_BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+BUCKET_LABELS = tuple(f"<={b}" for b in BUCKET_BOUNDS_MS) + (f">{BUCKET_BOUNDS_MS[-1]}",)
+# Raw events kept for dumps (histograms cover every request regardless)
+MAX_EVENTS = 5000
+
+
+class RequestEvent(NamedTuple):
+    endpoint: str
+    host: str
+    method: str
+    status: Optional[int]  # None when no response was received (or for non-HTTP steps such as "dns")
+    bytes: Optional[int]  # response body size; None if unknown (streamed without Content-Length)
+    seconds: float  # wall time of the call (rate-limit wait excluded)
+    started_at: float  # time.time() when the request was sent
+    attempt: int = 1
+    error: Optional[str] = None  # exception class name when the call raised
+    tags: Dict[str, str] = {}
+
+
+Subscriber = Callable[[RequestEvent], None]
+
+
+class Histogram:
+    """Fixed-bucket latency histogram; percentiles are bucket upper bounds (capped by the observed max)."""
+
+    __slots__ = ("counts", "count", "total", "min", "max")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.min = min(self.min, ms)
+        self.max = max(self.max, ms)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = max(1, int(round(pct / 100.0 * self.count)))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                bound = BUCKET_BOUNDS_MS[i] if i < len(BUCKET_BOUNDS_MS) else self.max
+                return round(min(bound, self.max), 1)
+        return round(self.max, 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 1) if self.count else None,
+            "min_ms": round(self.min, 1) if self.count else None,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "max_ms": round(self.max, 1) if self.count else None,
+            "buckets_ms": {label: n for label, n in zip(BUCKET_LABELS, self.counts) if n},
+        }
+
+
+class _EndpointStats:
+    __slots__ = ("histogram", "statuses", "errors", "bytes")
+
+    def __init__(self) -> None:
+        self.histogram = Histogram()
+        self.statuses: Dict[str, int] = {}
+        self.errors = 0
+        self.bytes = 0
+
+
+class Instrumentation:
+    """Collects RequestEvents from one or more clients; thread-safe."""
+
+    def __init__(self, max_events: int = MAX_EVENTS) -> None:
+        self._stats: Dict[str, _EndpointStats] = {}
+        self._events: Deque[RequestEvent] = deque(maxlen=max_events)
+        self._subscribers: List[Subscriber] = []
+        # (endpoint, "key=value") -> [attempts, successes], for outcomes that a status code alone does not show
+        self._outcomes: Dict[Tuple[str, str], List[int]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Subscriber) -> Callable[[], None]:
+        """Call callback(event) after every request; returns a function that unsubscribes it."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def record(self, event: RequestEvent) -> None:
+        with self._lock:
+            st = self._stats.get(event.endpoint)
+            if st is None:
+                st = self._stats[event.endpoint] = _EndpointStats()
+            st.histogram.add(event.seconds * 1000)
+            # No status and no error: a step without an HTTP response (e.g. a DNS lookup) that succeeded
+            key = str(event.status) if event.status is not None else (event.error or "ok")
+            st.statuses[key] = st.statuses.get(key, 0) + 1
+            if event.error is not None or (event.status or 0) >= 400:
+                st.errors += 1
+            st.bytes += event.bytes or 0
+            self._events.append(event)
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception:
+                logger.exception("Instrumentation subscriber %r failed", callback)
+
+    def note_outcome(self, endpoint: str, tags: Dict[str, str], ok: bool) -> None:
+        """Count a success/failure per tag, e.g. create_intent success rate by payment_warmup mode."""
+        with self._lock:
+            for key, value in tags.items():
+                counts = self._outcomes.setdefault((endpoint, f"{key}={value}"), [0, 0])
+                counts[0] += 1
+                counts[1] += 1 if ok else 0
+
+    def outcomes(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """{endpoint: {"key=value": {"attempts", "successes", "success_rate"}}}."""
+        with self._lock:
+            result: Dict[str, Dict[str, Dict[str, Any]]] = {}
+            for (endpoint, tag), (attempts, successes) in sorted(self._outcomes.items()):
+                result.setdefault(endpoint, {})[tag] = {
+                    "attempts": attempts,
+                    "successes": successes,
+                    "success_rate": round(successes / attempts, 3),
+                }
+            return result
+
+    def events(self) -> List[RequestEvent]:
+        with self._lock:
+            return list(self._events)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per endpoint: latency histogram summary, status counts, error count and bytes received."""
+        with self._lock:
+            return {
+                endpoint: {
+                    **st.histogram.to_dict(),
+                    "statuses": dict(st.statuses),
+                    "errors": st.errors,
+                    "bytes": st.bytes,
+                }
+                for endpoint, st in sorted(self._stats.items())
+            }
+
+    def log_summary(self) -> None:
+        for endpoint, st in self.snapshot().items():
+            logger.info(
+                "Requests %s: %d calls, p50 %sms, p95 %sms, max %sms, %d errors, %d bytes",
+                endpoint, st["count"], st["p50_ms"], st["p95_ms"], st["max_ms"], st["errors"], st["bytes"],
+            )
+        for endpoint, by_tag in self.outcomes().items():
+            for tag, counts in by_tag.items():
+                logger.info(
+                    "Outcome %s [%s]: %d/%d succeeded", endpoint, tag, counts["successes"], counts["attempts"]
+                )
+
+    def dump(self, path: Optional[Path] = None) -> Dict[str, Any]:
+        """Summary + recent events as a dict; also written to path (JSON) when given."""
+        data = {
+            "generated_at": time.time(),
+            "endpoints": self.snapshot(),
+            "outcomes": self.outcomes(),
+            "events": [event._asdict() for event in self.events()],
+        }
+        if path is not None:
+            try:
+                write_private_json(Path(path), data)
+            except OSError as e:
+                logger.warning("Could not write request timings %s: %s", path, e)
+        return data
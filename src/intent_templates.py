@@ -0,0 +1,101 @@
+"""
+Pre-built payment intent request bodies for the booking fast path. Before the release moment the
+scheduler builds, for every plausible (tenant, resource, start, duration) on the release day, the
+intent payload, its serialized JSON body and the app.playtomic.com warm-up params; at booking time
+create_payment_intent_for is a dict lookup plus a send.
+"""
+import json
+import threading
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .playtomic_client import PlaytomicClient
+
+TemplateKey = Tuple[str, str, str, datetime, int]
+
+
+class IntentTemplate:
+    """One ready-to-send create_payment_intent request."""
+
+    __slots__ = ("payload", "body", "warmup_params")
+
+    def __init__(self, payload: Dict[str, Any], body: bytes, warmup_params: Optional[Dict[str, Any]]) -> None:
+        self.payload = payload
+        self.body = body
+        self.warmup_params = warmup_params
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, Any], warmup_params: Optional[Dict[str, Any]] = None) -> "IntentTemplate":
+        return cls(payload, json.dumps(payload, separators=(",", ":")).encode("utf-8"), warmup_params)
+
+
+class IntentTemplateCache:
+    """
+    Templates keyed by (payment base, tenant, resource, start, duration minutes); start is an aware datetime,
+    so a slot time in any timezone finds its template. Entries are dropped when the client's user ids change
+    (they are part of the payload). Misses are built on the spot and kept.
+    """
+
+    def __init__(self, client: "PlaytomicClient") -> None:
+        self.client = client
+        self._templates: Dict[TemplateKey, IntentTemplate] = {}
+        self._owner: Tuple[Optional[str], Optional[str]] = (None, None)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def _check_owner(self) -> None:
+        owner = (self.client.user_id, self.client.playtomic_io_user_id)
+        if owner != self._owner:
+            self._templates.clear()
+            self._owner = owner
+
+    def build(self, base: str, tenant_id: str, resource_id: str, start_date: datetime, duration_minutes: int) -> IntentTemplate:
+        """Template for this candidate against base (uncached)."""
+        data = self.client.prepare_payment_intent_data(tenant_id, resource_id, start_date, duration_minutes)
+        payload = self.client._intent_payload(data, base)
+        return IntentTemplate.from_payload(payload, self.client._payment_warmup_params_for(base, payload))
+
+    def get(self, base: str, tenant_id: str, resource_id: str, start_date: datetime, duration_minutes: int) -> IntentTemplate:
+        key = (base, tenant_id, resource_id, start_date, duration_minutes)
+        with self._lock:
+            self._check_owner()
+            template = self._templates.get(key)
+            if template is not None:
+                self.hits += 1
+                return template
+            self.misses += 1
+        template = self.build(base, tenant_id, resource_id, start_date, duration_minutes)
+        with self._lock:
+            self._templates[key] = template
+        return template
+
+    def any_warmup_params(self) -> Optional[Dict[str, Any]]:
+        """Warm-up params of some pre-built template (for a one-off pre-release session warm-up)."""
+        with self._lock:
+            return next((t.warmup_params for t in self._templates.values() if t.warmup_params), None)
+
+    def prebuild(
+        self,
+        base: str,
+        tenant_id: str,
+        resource_ids: Iterable[str],
+        starts: Iterable[datetime],
+        duration_minutes: int,
+    ) -> int:
+        """Build templates for every resource x start; returns how many were added."""
+        resource_ids, starts = list(resource_ids), list(starts)
+        built = {
+            (base, tenant_id, resource_id, start, duration_minutes): self.build(base, tenant_id, resource_id, start, duration_minutes)
+            for resource_id in resource_ids
+            for start in starts
+        }
+        with self._lock:
+            self._check_owner()
+            before = len(self._templates)
+            self._templates.update(built)
+            return len(self._templates) - before
@@ -0,0 +1,68 @@
+"""
+Per-account record of which payment base URL last produced a valid JSON payment intent (and how fast).
+In the release window the client goes straight to that backend; the fallback order is only
+re-explored on runs outside the window.
+"""
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .session_store import account_key
+from .utils.json_file import read_json_dict, write_private_json
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_BACKENDS_FILE_NAME = "payment_backends.json"
+
+
+class PaymentBackendStore:
+    """
+    JSON file of {account_key: {"preferred": base, "bases": {base: {ok, latency_ms, updated_at}}}}.
+    Loaded on first use; outcomes are kept in memory (thread-safe) and written once by save() at the end of a run.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        if path is None:
+            from .utils.directory import get_cache_dir
+            path = get_cache_dir() / PAYMENT_BACKENDS_FILE_NAME
+        self.path = Path(path)
+        self._data: Optional[Dict[str, Any]] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _loaded(self) -> Dict[str, Any]:
+        if self._data is None:
+            self._data = read_json_dict(self.path)
+        return self._data
+
+    def preferred_base(self, email: str) -> Optional[str]:
+        """Payment base that last returned a JSON intent for this account, if any."""
+        with self._lock:
+            return (self._loaded().get(account_key(email)) or {}).get("preferred")
+
+    def record(self, email: str, base: str, ok: bool, latency_seconds: float) -> None:
+        """Note the outcome of a create_payment_intent against base; a success makes it the preferred one."""
+        with self._lock:
+            data = self._loaded()
+            entry = data.setdefault(account_key(email), {})
+            bases = entry.setdefault("bases", {})
+            bases[base] = {"ok": ok, "latency_ms": round(latency_seconds * 1000, 1), "updated_at": time.time()}
+            if ok:
+                entry["preferred"] = base
+            elif entry.get("preferred") == base:
+                entry.pop("preferred")
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the recorded outcomes (no-op when nothing changed)."""
+        with self._lock:
+            if not self._dirty or self._data is None:
+                return
+            try:
+                write_private_json(self.path, self._data)
+            except OSError as e:
+                logger.warning("Could not write payment backend record %s: %s", self.path, e)
+                return
+            self._dirty = False
@@ -3,11 +3,30 @@ Playtomic API client (reverse-engineered from app behavior).
 Uses same endpoints as the official app: auth at v3, booking/availability at v1.
 """
 import logging
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Text
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
 
 import pytz
 import requests
+from requests.cookies import create_cookie
+
+from . import rate_limit, retry
+from .circuit_breaker import CLOSED, HALF_OPEN, CircuitBreaker
+from .config import RetryPolicy, TransportConfig
+from .instrumentation import Instrumentation, RequestEvent
+from .intent_templates import IntentTemplate, IntentTemplateCache
+from .latency import LatencyTracker
+from .payment_backends import PaymentBackendStore
+from .rate_limit import RateLimiter
+from .session_store import token_expiry
+from .transport import mount_adapters, route_adapters
+from .utils import json_codec
+from .utils.json_stream import iter_json_array
 
 logger = logging.getLogger(__name__)
 
@@ -25,25 +44,132 @@ IO_API_URL = f"{IO_BASE}/api/v1"
 # api.playtomic.io: alternative payment API; web login token may work here when playtomic.io login fails
 API_IO_BASE = "https://api.playtomic.io"
 API_IO_V1 = f"{API_IO_BASE}/v1"
+PAYMENT_BASE_LABELS = {
+    IO_API_URL: "playtomic.io",
+    API_IO_V1: "api.playtomic.io (web token)",
+    PAYMENT_API_URL: "app.playtomic.com",
+}
+# Hedging: samples needed before the percentile is trusted, floor on the hedge delay, minimum worker
+# threads (the pool grows to a primary and a hedge per concurrent availability request)
+HEDGE_MIN_SAMPLES = 5
+HEDGE_MIN_DELAY = 0.05
+HEDGE_POOL_SIZE = 8
+# Read size when streaming availability bodies
+STREAM_CHUNK_SIZE = 8192
 USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
     "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 )
 
 
+def _body_size(response: requests.Response) -> Optional[int]:
+    """Body size in bytes without forcing a streamed body to download (Content-Length, else None)."""
+    if response._content_consumed and isinstance(response._content, bytes):
+        return len(response._content)
+    length = response.headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else None
+
+
+def _close_response(future: "Future[requests.Response]") -> None:
+    """Done-callback for a hedging loser: release its connection."""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
 class PlaytomicClient:
     """Client for Playtomic API: login, availability, payment intents, confirm reservation."""
 
-    def __init__(self, email: str, password: str) -> None:
+    def __init__(
+        self,
+        email: str,
+        password: str,
+        hedge_percentile: Optional[float] = None,
+        hedge_initial_delay: float = 0.5,
+        transport: Optional[TransportConfig] = None,
+        retry_policies: Optional[Dict[str, RetryPolicy]] = None,
+        instrumentation: Optional[Instrumentation] = None,
+    ) -> None:
         self.email = email
         self.password = password
-        self.session = requests.Session()
-        self.session.headers.update(self._get_headers())
         self.access_token: Optional[str] = None
         self.user_id: Optional[str] = None
         # playtomic.io token (for payment API when .com returns HTML)
         self.playtomic_io_token: Optional[str] = None
         self.playtomic_io_user_id: Optional[str] = None
+        # Payment base that last produced a JSON intent for this account (see PaymentBackendStore)
+        self.preferred_payment_base: Optional[str] = None
+        # Circuit breaker per payment base (see src/circuit_breaker.py); thresholds are set from config
+        self.payment_breaker_failures = 3
+        self.payment_breaker_reset_seconds = 30.0
+        self._payment_breakers: Dict[str, CircuitBreaker] = {}
+        # Times a payment circuit opened this run (the scheduler re-plans its booking pass when this changes)
+        self.payment_breaker_opens = 0
+        # Base each payment intent was created on: update/confirm go to the same backend
+        self._intent_bases: Dict[str, str] = {}
+        # Origin -> replacement origin (e.g. {"https://playtomic.com": "http://127.0.0.1:8765"}) to point
+        # the client at a stand-in server; URLs are rewritten only when the request is sent (RoutingAdapter)
+        self.base_url_overrides: Dict[str, str] = {}
+        self.transport = transport or TransportConfig()
+        # Per-endpoint retry policies ({} = never retry)
+        self.retry_policies = retry.DEFAULT_RETRY_POLICIES if retry_policies is None else retry_policies
+        # Set when a request got 401: the session has expired and the next attempt should log in again
+        self.needs_login = False
+        # Called after a 401 (e.g. TokenRefresher.wake) so credentials are renewed off the hot path
+        self.on_unauthorized: Optional[Callable[[], None]] = None
+        # Serialises logins between the hot path and a background TokenRefresher
+        self._auth_lock = threading.RLock()
+        # Pluggable JSON decoder for availability and payment responses (see utils.json_codec)
+        self.json_loads = json_codec.loads
+        self.session = self._build_session()
+        # Optional: remember which payment base works for this account (set by the scheduler)
+        self.payment_backends: Optional[PaymentBackendStore] = None
+        # Token buckets; None = use the process-wide limiter from rate_limit.configure (if any)
+        self.rate_limiter: Optional[RateLimiter] = None
+        # Response times per endpoint name (login, availability, create_intent, ...)
+        self.latency = LatencyTracker()
+        # Every request as a RequestEvent (histograms + subscribers); share one across clients to aggregate
+        self.instrumentation = instrumentation or Instrumentation()
+        # Added to the tags of every RequestEvent from this client (e.g. account, phase)
+        self.instrumentation_tags: Dict[str, str] = {}
+        # Hedged availability requests: duplicate a request still pending after the
+        # hedge_percentile-th percentile of recent availability latency (None = off)
+        self.hedge_percentile = hedge_percentile
+        self.hedge_initial_delay = hedge_initial_delay
+        # Availability requests the caller runs at once (availability_workers); sizes the hedge pool
+        self.availability_workers = 1
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+        self._hedge_pool_lock = threading.Lock()
+        # Pre-serialized create_payment_intent bodies (see src/intent_templates.py)
+        self.intent_templates = IntentTemplateCache(self)
+        # app.playtomic.com /payments warm-up: "prerelease" (once before release, concurrent fallback),
+        # "concurrent" (alongside every intent POST), "inline" (awaited before each POST) or "off"
+        self.payment_warmup = "prerelease"
+        self.payment_session_warmed_at: Optional[float] = None
+
+    def web_credentials_expire_at(self) -> Optional[float]:
+        """When the web login stops working: JWT exp of the token, or the earliest session cookie expiry."""
+        if self.access_token == "__session__":
+            return min(self._cookie_expiries(), default=None)
+        return token_expiry(self.access_token)
+
+    def io_credentials_expire_at(self) -> Optional[float]:
+        return token_expiry(self.playtomic_io_token)
+
+    def credentials_expire_at(self) -> Optional[float]:
+        """Earliest known expiry of the web and playtomic.io credentials (None if unknown)."""
+        expiries = [e for e in (self.web_credentials_expire_at(), self.io_credentials_expire_at()) if e]
+        return min(expiries, default=None)
+
+    @staticmethod
+    def _expires_within(expires_at: Optional[float], seconds: float) -> bool:
+        return expires_at is not None and expires_at - time.time() <= seconds
+
+    def _route(self, url: str) -> str:
+        """url with its origin replaced per base_url_overrides (unchanged without a matching override)."""
+        for origin, target in self.base_url_overrides.items():
+            if url == origin or url.startswith(origin + "/") or url.startswith(origin + "?"):
+                return target.rstrip("/") + url[len(origin):]
+        return url
 
     def _get_headers(self) -> Dict[str, str]:
         return {
@@ -54,63 +180,532 @@ class PlaytomicClient:
             "Content-Type": "application/json",
         }
 
+    def _apply_web_login_body(self, body: Dict[str, Any]) -> None:
+        """Store token/user id from a JSON web-app login response."""
+        self.access_token = body.get("access_token") or body.get("token")
+        self.user_id = body.get("user_id") or (str(body.get("user_id")) if body.get("user_id") is not None else None)
+
+    def _apply_session_login(self) -> None:
+        """Session/cookie auth: no token in body; session cookies are kept by the HTTP session."""
+        self.access_token = "__session__"
+        self.user_id = None
+
+    def _apply_io_login_body(self, body: Dict[str, Any]) -> bool:
+        """Store the playtomic.io token from a login response. Returns True if a usable token was found."""
+        token = body.get("access_token") or body.get("token")
+        uid = body.get("user_id")
+        if uid is not None:
+            uid = str(uid)
+        if token and token != "__session__":
+            self.playtomic_io_token = token
+            self.playtomic_io_user_id = uid
+            logger.info("playtomic.io login OK (token for payment API)")
+            return True
+        return False
+
+    def _clear_io_login(self) -> None:
+        self.playtomic_io_token = None
+        self.playtomic_io_user_id = None
+
+    @staticmethod
+    def _days_in_range(start_date: datetime, end_date: datetime) -> List[datetime]:
+        """Midnight of every day from start_date through end_date."""
+        days: List[datetime] = []
+        day = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        end_day = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
+        while day <= end_day:
+            days.append(day)
+            day += timedelta(days=1)
+        return days
+
+    @staticmethod
+    def _availability_params(tenant_id: str, day: datetime) -> Dict[str, str]:
+        return {
+            "tenant_id": tenant_id,
+            "date": day.strftime("%Y-%m-%d"),
+            "sport_id": "PADEL",
+        }
+
+    def _payment_headers(self) -> Dict[str, str]:
+        """Headers for app.playtomic.com payment API (same domain as payments page)."""
+        return {"Origin": APP_BASE, "Referer": f"{APP_BASE}/"}
+
+    def _payment_base_usable(self, base: str) -> bool:
+        """True if we hold the credentials this payment base needs."""
+        if base == IO_API_URL:
+            return bool(self.playtomic_io_token)
+        if base == API_IO_V1:
+            return bool(self.access_token and self.access_token != "__session__")
+        return True
+
+    def _payment_request_headers(self, base: Optional[str] = None) -> Dict[str, str]:
+        """Headers for payment API: playtomic.io or api.playtomic.io use Bearer; app.playtomic.com uses session."""
+        base = base or self._payment_base_url()
+        if base == IO_API_URL:
+            return {
+                "Authorization": f"Bearer {self.playtomic_io_token}",
+                "Origin": IO_BASE,
+                "Referer": f"{IO_BASE}/",
+                "Content-Type": "application/json",
+            }
+        if base == API_IO_V1:
+            return {
+                "Authorization": f"Bearer {self.access_token}",
+                "Origin": API_IO_BASE,
+                "Referer": f"{API_IO_BASE}/",
+                "Content-Type": "application/json",
+            }
+        return self._payment_headers()
+
+    def _payment_base_candidates(self) -> List[str]:
+        """
+        Payment bases we hold credentials for, in order: the account's known-good backend
+        (preferred_payment_base), then playtomic.io > api.playtomic.io (web token) > app.playtomic.com.
+        """
+        candidates: List[str] = []
+        for base in (self.preferred_payment_base, IO_API_URL, API_IO_V1, PAYMENT_API_URL):
+            if base and base not in candidates and self._payment_base_usable(base):
+                candidates.append(base)
+        return candidates
+
+    def _payment_breaker(self, base: str) -> CircuitBreaker:
+        breaker = self._payment_breakers.get(base)
+        if breaker is None:
+            # setdefault: concurrent intents must share one breaker (and so one half-open probe) per base
+            breaker = self._payment_breakers.setdefault(
+                base, CircuitBreaker(self.payment_breaker_failures, self.payment_breaker_reset_seconds)
+            )
+        return breaker
+
+    def _payment_base_url(self) -> str:
+        """
+        Base URL for payment_intents: the first candidate whose circuit is not open. If every
+        circuit is open, the first candidate is used anyway (better a likely failure than none).
+        """
+        candidates = self._payment_base_candidates()
+        for base in candidates:
+            if self._payment_breaker(base).available():
+                return base
+        return candidates[0]
+
+    @contextmanager
+    def _claimed_payment_base(self) -> Iterator[str]:
+        """
+        _payment_base_url for an intent about to be sent. A half-open backend is picked only by the caller
+        that gets its single probe (the others move on to the next candidate); the probe is handed back
+        on exit unless the outcome was already recorded.
+        """
+        candidates = self._payment_base_candidates()
+        base, probe = candidates[0], False
+        for candidate in candidates:
+            admitted = self._payment_breaker(candidate).admit()
+            if admitted is not None:
+                base, probe = candidate, admitted == HALF_OPEN
+                break
+        try:
+            yield base
+        finally:
+            if probe:
+                self._payment_breaker(base).release_probe()
+
+    def _intent_base(self, payment_intent_id: str) -> str:
+        """Payment base the intent was created on (current choice if unknown)."""
+        return self._intent_bases.get(payment_intent_id) or self._payment_base_url()
+
+    def _note_payment_outcome(self, base: str, ok: bool, status: Optional[int] = None, html: bool = False) -> None:
+        """Feed a create_payment_intent outcome into the backend's breaker; logs when it opens or recovers."""
+        breaker = self._payment_breaker(base)
+        label = PAYMENT_BASE_LABELS.get(base, base)
+        if ok:
+            if breaker.state != CLOSED:
+                logger.info("Payment backend %s recovered; circuit closed", label)
+            breaker.record_success()
+            return
+        # HTML page or auth rejection: the backend answers but will not work for us until something changes
+        hard = html or status in (401, 403, 404, 405)
+        if breaker.record_failure(hard=hard):
+            self.payment_breaker_opens += 1
+            logger.warning(
+                "Payment backend %s failing; circuit open for %gs, using %s meanwhile",
+                label,
+                breaker.reset_seconds,
+                PAYMENT_BASE_LABELS.get(self._payment_base_url(), self._payment_base_url()),
+            )
+
+    @staticmethod
+    def _backend_failure_status(status: int) -> bool:
+        """True for answers that say the backend (not the slot) is the problem: auth rejected or server error."""
+        return status in (401, 403, 404, 405, 429) or status >= 500
+
+    def _hosts_in_use(self) -> List[str]:
+        """Origins this client will talk to in the booking path (web app + chosen payment backend)."""
+        base = self._payment_base_url()
+        if base == IO_API_URL:
+            payment_origin = IO_BASE
+        elif base == API_IO_V1:
+            payment_origin = API_IO_BASE
+        else:
+            payment_origin = APP_BASE
+        return [WEB_BASE, payment_origin]
+
+    def _urls_to_resolve(self) -> List[str]:
+        """URLs (after overrides) whose hosts a run may reach: web app, playtomic.io, app.playtomic.com, payment backends."""
+        return [self._route(url) for url in (WEB_BASE, IO_AUTH_URL, APP_BASE, *self._payment_base_candidates())]
+
+    def _intent_payload(self, data: Dict[str, Any], base: str) -> Dict[str, Any]:
+        """Copy of the intent body, with the playtomic.io user id when paying through playtomic.io."""
+        payload = dict(data)
+        if base == IO_API_URL and self.playtomic_io_user_id:
+            payload["user_id"] = self.playtomic_io_user_id
+        return payload
+
+    def _payment_warmup_params(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Query params for the app.playtomic.com/payments page of this intent (None without cart data)."""
+        cart = payload.get("cart", {}) or {}
+        item = cart.get("requested_item", {}) or {}
+        item_data = item.get("cart_item_data", {}) or {}
+        if not item_data:
+            return None
+        start = item_data.get("start", "")
+        duration_hours = item_data.get("duration", 1.5)
+        duration_mins = int(round(duration_hours * 60))
+        return {
+            "type": "CUSTOMER_MATCH",
+            "tenant_id": item_data.get("tenant_id", ""),
+            "resource_id": item_data.get("resource_id", ""),
+            "start": start,
+            "duration": duration_mins,
+        }
+
+    def _payment_warmup_params_for(self, base: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Warm-up params when paying through app.playtomic.com (its /payments page), else None."""
+        return self._payment_warmup_params(payload) if base == PAYMENT_API_URL else None
+
+    def _html_payment_error(self, url: Any, base: str, body_preview: str) -> ValueError:
+        """Log and build the error for a payment API answer that is the web app page instead of JSON."""
+        used = PAYMENT_BASE_LABELS.get(base, base)
+        logger.error(
+            "Payment API returned HTML instead of JSON (url=%s, tried %s). "
+            "The server sent the web app page instead of a booking response. See PAYMENT_API_TROUBLESHOOTING.md.",
+            url,
+            used,
+        )
+        logger.debug("Response body start: %r", body_preview)
+        return ValueError(
+            "Payment API returned HTML instead of JSON. "
+            "playtomic.io login may have failed and app.playtomic.com returns the web app page. "
+            "See PAYMENT_API_TROUBLESHOOTING.md to capture the real booking request from your browser."
+        )
+
+    def prepare_payment_intent_data(
+        self,
+        tenant_id: str,
+        resource_id: str,
+        start_date: datetime,
+        duration_minutes: int,
+    ) -> Dict[str, Any]:
+        """Build payload for create_payment_intent (court booking)."""
+        utc_start = start_date.astimezone(pytz.utc)
+        duration_hours = duration_minutes / 60.0
+        return {
+            "allowed_payment_method_types": [
+                "OFFER", "CASH", "MERCHANT_WALLET", "DIRECT",
+                "SWISH", "IDEAL", "BANCONTACT", "PAYTRAIL",
+                "CREDIT_CARD", "QUICK_PAY",
+            ],
+            "user_id": self.user_id,
+            "cart": {
+                "requested_item": {
+                    "cart_item_type": "CUSTOMER_MATCH",
+                    "cart_item_voucher_id": None,
+                    "cart_item_data": {
+                        "supports_split_payment": True,
+                        "number_of_players": 4,
+                        "tenant_id": tenant_id,
+                        "resource_id": resource_id,
+                        "start": utc_start.strftime("%Y-%m-%dT%H:%M:%S"),
+                        "duration": duration_hours,
+                        "match_registrations": [{"user_id": self.user_id, "pay_now": True}],
+                    },
+                }
+            },
+        }
+
+
+    def _decode(self, response: requests.Response) -> Any:
+        """Decode a JSON body with self.json_loads (fast backend when installed); ValueError if not JSON."""
+        return self.json_loads(response.content)
+
+    def _build_session(self) -> requests.Session:
+        """
+        New session with browser headers and the pools/socket options of self.transport; base_url_overrides
+        are applied by the adapters, so requests, cookies and cassettes all use the real URLs.
+        """
+        session = requests.Session()
+        session.headers.update(self._get_headers())
+        mount_adapters(session, self.transport)
+        route_adapters(session, self._route)
+        return session
+
+    def _send(self, endpoint: str, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Single choke point for HTTP calls: applies the endpoint's (connect, read) timeout from the
+        transport config and retries per the endpoint's RetryPolicy (see src/retry.py).
+        """
+        kwargs.setdefault("timeout", self.transport.timeout_for(endpoint))
+        policy = self.retry_policies.get(endpoint)
+        attempt = 1
+        while True:
+            try:
+                response = self._send_once(endpoint, method, url, attempt, **kwargs)
+            except requests.RequestException as e:
+                if policy is None or attempt >= policy.max_attempts or not retry.should_retry_exception(policy, e):
+                    raise
+                delay = retry.backoff_delay(policy, attempt)
+                logger.info("%s request failed (%s); retry %d in %.2fs", endpoint, e, attempt, delay)
+            else:
+                if response.status_code == 401:
+                    self.needs_login = True
+                    if self.on_unauthorized is not None:
+                        self.on_unauthorized()
+                delay = None
+                if policy is not None and attempt < policy.max_attempts:
+                    delay = retry.response_retry_delay(policy, response, attempt)
+                if delay is None:
+                    return response
+                logger.info("%s request got HTTP %d; retry %d in %.2fs", endpoint, response.status_code, attempt, delay)
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def _send_once(self, endpoint: str, method: str, url: str, attempt: int = 1, **kwargs: Any) -> requests.Response:
+        """
+        One try: waits for the rate limiter (own or process-wide), sends, records latency per endpoint
+        and emits a RequestEvent to self.instrumentation (also for calls that raise).
+        """
+        host = urlsplit(url).hostname or ""
+        limiter = self.rate_limiter or rate_limit.shared_limiter()
+        if limiter is not None:
+            waited = limiter.acquire(host, endpoint)
+            if waited > 0:
+                logger.debug("Rate limit: %s request to %s waited %.3fs", endpoint, host, waited)
+        started_at = time.time()
+        started = time.monotonic()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException as e:
+            self._emit(endpoint, host, method, None, None, time.monotonic() - started, started_at, attempt, type(e).__name__)
+            raise
+        elapsed = time.monotonic() - started
+        self.latency.observe(endpoint, elapsed)
+        if limiter is not None:
+            limiter.note_status(host, endpoint, response.status_code)
+        self._emit(endpoint, host, method, response.status_code, _body_size(response), elapsed, started_at, attempt)
+        return response
+
+    def _emit(
+        self,
+        endpoint: str,
+        host: str,
+        method: str,
+        status: Optional[int],
+        size: Optional[int],
+        seconds: float,
+        started_at: float,
+        attempt: int,
+        error: Optional[str] = None,
+    ) -> None:
+        self.instrumentation.record(
+            RequestEvent(
+                endpoint, host, method, status, size, seconds, started_at, attempt, error, dict(self.instrumentation_tags)
+            )
+        )
+
+    def _hedge_delay(self, endpoint: str) -> float:
+        """Seconds to wait before hedging: the configured percentile once enough samples exist."""
+        if self.latency.count(endpoint) < HEDGE_MIN_SAMPLES:
+            return self.hedge_initial_delay
+        return max(HEDGE_MIN_DELAY, self.latency.percentile(endpoint, self.hedge_percentile or 95.0) or 0.0)
+
+    def _background_pool(self) -> ThreadPoolExecutor:
+        """Shared worker pool for hedged requests and fire-and-forget calls (created on first use)."""
+        with self._hedge_pool_lock:
+            if self._hedge_pool is None:
+                workers = max(HEDGE_POOL_SIZE, 2 * self.availability_workers)
+                self._hedge_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hedge")
+            return self._hedge_pool
+
+    def _send_hedged(self, endpoint: str, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Send a request; if it has not answered within _hedge_delay, send a duplicate and return whichever
+        answers first. requests cannot abort an in-flight call, so the loser is cancelled if not yet started
+        and otherwise its response is closed as soon as it arrives (connection goes back to the pool).
+        Only for idempotent requests.
+        """
+        pool = self._background_pool()
+        sent = threading.Event()
+
+        def send_primary() -> requests.Response:
+            sent.set()
+            return self._send(endpoint, method, url, **kwargs)
+
+        primary = pool.submit(send_primary)
+        delay = self._hedge_delay(endpoint)
+        # The delay counts from when the primary goes out, not from when it was queued
+        sent.wait()
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        logger.debug("Hedging slow %s request to %s", endpoint, url)
+        hedge = pool.submit(self._send, endpoint, method, url, **kwargs)
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is None:
+                    for loser in pending:
+                        if not loser.cancel():
+                            loser.add_done_callback(_close_response)
+                    return fut.result()
+                error = fut.exception()
+        raise error  # both attempts failed
+
     def login(self) -> Dict[str, Any]:
         """Login via web-app endpoint; may set session cookies or return token."""
         url = WEB_LOGIN_URL
         data = {"email": self.email, "password": self.password}
-        response = self.session.post(
+        response = self._send(
+            "login",
+            "POST",
             url,
             json=data,
-            timeout=15,
             allow_redirects=True,
         )
         response.raise_for_status()
+        self.needs_login = False
         # Try JSON body (token-style API)
         try:
             body = response.json()
-            self.access_token = body.get("access_token") or body.get("token")
-            self.user_id = body.get("user_id") or (str(body.get("user_id")) if body.get("user_id") is not None else None)
+            self._apply_web_login_body(body)
             if self.access_token and self.access_token != "__session__":
                 self.session.headers.update({"Authorization": f"Bearer {self.access_token}"})
             return body
         except Exception:
             pass
-        # Session/cookie auth: no token in body; session cookies are in self.session
-        self.access_token = "__session__"
-        self.user_id = None
+        self._apply_session_login()
         return {}
 
     def ensure_logged_in(self) -> None:
-        if not self.access_token:
-            self.login()
+        """Log in only if there are no credentials or they have expired (normally TokenRefresher got there first)."""
+        if self.access_token and not self.needs_login and not self._expires_within(self.credentials_expire_at(), 0):
+            return
+        self.refresh_credentials()
+
+    def refresh_credentials(self, lead_seconds: float = 0.0) -> bool:
+        """
+        Log in again where credentials are missing, got a 401, or expire within lead_seconds: the web
+        login, and playtomic.io when its token is in use. Returns True if anything was renewed.
+        """
+        with self._auth_lock:
+            refreshed = False
+            if not self.access_token or self.needs_login or self._expires_within(self.web_credentials_expire_at(), lead_seconds):
+                self.login()
+                refreshed = True
+            if self.playtomic_io_token and self._expires_within(self.io_credentials_expire_at(), lead_seconds):
+                self.login_playtomic_io()
+                refreshed = True
+            return refreshed
+
+    def _cookie_expiries(self) -> List[float]:
+        return [float(c.expires) for c in self.session.cookies if c.expires]
+
+    def export_session(self) -> Dict[str, Any]:
+        """Cookies, tokens and user ids of this client, as plain data (for SessionStore)."""
+        cookies = [
+            {
+                "name": c.name,
+                "value": c.value,
+                "domain": c.domain,
+                "path": c.path,
+                "expires": c.expires,
+                "secure": c.secure,
+            }
+            for c in self.session.cookies
+        ]
+        return {
+            "cookies": cookies,
+            "access_token": self.access_token,
+            "user_id": self.user_id,
+            "playtomic_io_token": self.playtomic_io_token,
+            "playtomic_io_user_id": self.playtomic_io_user_id,
+        }
+
+    def restore_session(self, state: Dict[str, Any]) -> None:
+        """Restore a state from export_session() so no login request is needed."""
+        for c in state.get("cookies", []):
+            self.session.cookies.set_cookie(
+                create_cookie(
+                    c["name"],
+                    c["value"],
+                    domain=c.get("domain", ""),
+                    path=c.get("path", "/"),
+                    expires=c.get("expires"),
+                    secure=c.get("secure", False),
+                )
+            )
+        self.access_token = state.get("access_token")
+        self.user_id = state.get("user_id")
+        self.playtomic_io_token = state.get("playtomic_io_token")
+        self.playtomic_io_user_id = state.get("playtomic_io_user_id")
+        if self.access_token and self.access_token != "__session__":
+            self.session.headers.update({"Authorization": f"Bearer {self.access_token}"})
+
+    def warm_connections(self, deadline: Optional[float] = None) -> int:
+        """
+        Open (or keep alive) pooled connections to every host in the booking path with a cheap HEAD,
+        so the first request after release skips DNS/TCP/TLS setup. Returns how many hosts answered.
+        The HEADs go out concurrently; with deadline (a time.monotonic() value) each gets at most the
+        time left until then, and none is sent once it has passed.
+        """
+        connect, read = self.transport.timeout_for("keepalive")
+        if deadline is not None:
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return 0
+            connect, read = min(connect, left), min(read, left)
+
+        def warm(origin: str) -> bool:
+            try:
+                self._send("keepalive", "HEAD", f"{origin}/", allow_redirects=False, timeout=(connect, read))
+            except requests.RequestException as e:
+                logger.debug("Warm-up of %s failed: %s", origin, e)
+                return False
+            return True
+
+        origins = self._hosts_in_use()
+        with ThreadPoolExecutor(max_workers=len(origins), thread_name_prefix="warmup") as pool:
+            return sum(pool.map(warm, origins))
 
     def login_playtomic_io(self) -> bool:
         """Login at playtomic.io to get Bearer token for payment API. Returns True if token obtained."""
         try:
-            resp = self.session.post(
+            resp = self._send(
+                "io_login",
+                "POST",
                 IO_AUTH_URL,
                 json={"email": self.email, "password": self.password},
-                timeout=15,
                 allow_redirects=False,
             )
             resp.raise_for_status()
-            body = resp.json()
-            token = body.get("access_token") or body.get("token")
-            uid = body.get("user_id")
-            if uid is not None:
-                uid = str(uid)
-            if token and token != "__session__":
-                self.playtomic_io_token = token
-                self.playtomic_io_user_id = uid
-                logger.info("playtomic.io login OK (token for payment API)")
+            if self._apply_io_login_body(resp.json()):
                 return True
         except Exception as e:
             logger.warning(
                 "playtomic.io login failed (will try api.playtomic.io with web token, then app.playtomic.com): %s",
                 e,
             )
-        self.playtomic_io_token = None
-        self.playtomic_io_user_id = None
+        self._clear_io_login()
         return False
 
     def fetch_availability(
@@ -118,153 +713,191 @@ class PlaytomicClient:
         tenant_id: str,
         start_date: datetime,
         end_date: datetime,
+        max_workers: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
-        """Fetch availability for a tenant; uses playtomic.com per-day API (session auth)."""
+        """
+        Fetch availability for a tenant; uses playtomic.com per-day API (session auth).
+        With max_workers > 1 the days of the range are fetched concurrently (bounded thread pool);
+        results are still returned in date order and the first failing day (in date order) raises.
+        """
         self.ensure_logged_in()
-        # playtomic.com uses single date param per request; loop day by day
-        from datetime import timedelta
+        # playtomic.com uses single date param per request; one request per day
+        days = self._days_in_range(start_date, end_date)
+        if max_workers and max_workers > 1 and len(days) > 1:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(days))) as pool:
+                pages = list(pool.map(lambda d: self._fetch_availability_day(tenant_id, d), days))
+        else:
+            pages = [self._fetch_availability_day(tenant_id, d) for d in days]
         results: List[Dict[str, Any]] = []
-        day = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_day = end_date.replace(hour=0, minute=0, second=0, microsecond=0)
-        while day <= end_day:
-            params = {
-                "tenant_id": tenant_id,
-                "date": day.strftime("%Y-%m-%d"),
-                "sport_id": "PADEL",
-            }
-            response = self.session.get(WEB_AVAILABILITY_URL, params=params, timeout=10)
-            response.raise_for_status()
-            data = response.json()
-            if isinstance(data, list):
-                results.extend(data)
-            day += timedelta(days=1)
-        return results if results else []
+        for page in pages:
+            results.extend(page)
+        return results
 
-    def _payment_headers(self) -> Dict[str, str]:
-        """Headers for app.playtomic.com payment API (same domain as payments page)."""
-        return {"Origin": APP_BASE, "Referer": f"{APP_BASE}/"}
-
-    def _use_playtomic_io_payment(self) -> bool:
-        """True if we have playtomic.io Bearer token for payment."""
-        return bool(self.playtomic_io_token)
-
-    def _use_web_token_payment(self) -> bool:
-        """True if we should try api.playtomic.io with web login token (when playtomic.io login failed)."""
-        if self.playtomic_io_token:
-            return False
-        return bool(self.access_token and self.access_token != "__session__")
+    def _fetch_availability_day(self, tenant_id: str, day: datetime) -> List[Dict[str, Any]]:
+        """Fetch availability for a single day (raises HTTPError on failure)."""
+        params = self._availability_params(tenant_id, day)
+        if self.hedge_percentile is not None:
+            response = self._send_hedged("availability", "GET", WEB_AVAILABILITY_URL, params=params)
+        else:
+            response = self._send("availability", "GET", WEB_AVAILABILITY_URL, params=params)
+        response.raise_for_status()
+        data = self._decode(response)
+        return data if isinstance(data, list) else []
 
-    def _payment_request_headers(self) -> Dict[str, str]:
-        """Headers for payment API: playtomic.io or api.playtomic.io use Bearer; app.playtomic.com uses session."""
-        if self._use_playtomic_io_payment():
-            return {
-                "Authorization": f"Bearer {self.playtomic_io_token}",
-                "Origin": IO_BASE,
-                "Referer": f"{IO_BASE}/",
-                "Content-Type": "application/json",
-            }
-        if self._use_web_token_payment():
-            return {
-                "Authorization": f"Bearer {self.access_token}",
-                "Origin": API_IO_BASE,
-                "Referer": f"{API_IO_BASE}/",
-                "Content-Type": "application/json",
-            }
-        return self._payment_headers()
+    def stream_availability_day(self, tenant_id: str, day: datetime) -> Iterator[Dict[str, Any]]:
+        """
+        Availability entries of one day, yielded one by one while the body downloads (flat memory, and the
+        caller can start matching before the last court arrives). The request is sent and its status
+        checked before returning, so HTTPError is raised here rather than mid-iteration.
+        """
+        self.ensure_logged_in()
+        params = self._availability_params(tenant_id, day)
+        response = self._send("availability", "GET", WEB_AVAILABILITY_URL, params=params, stream=True)
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            response.close()
+            raise
+        return self._iter_streamed_entries(response)
 
-    def _payment_base_url(self) -> str:
-        """Base URL for payment_intents: playtomic.io > api.playtomic.io (web token) > app.playtomic.com."""
-        if self._use_playtomic_io_payment():
-            return IO_API_URL
-        if self._use_web_token_payment():
-            return API_IO_V1
-        return PAYMENT_API_URL
+    def _iter_streamed_entries(self, response: requests.Response) -> Iterator[Dict[str, Any]]:
+        try:
+            yield from iter_json_array(response.iter_content(chunk_size=STREAM_CHUNK_SIZE))
+        finally:
+            response.close()
 
     def create_payment_intent(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Create payment intent (playtomic.io > api.playtomic.io with web token > app.playtomic.com)."""
         self.ensure_logged_in()
-        base = self._payment_base_url()
+        with self._claimed_payment_base() as base:
+            payload = self._intent_payload(data, base)
+            return self._create_intent(base, IntentTemplate.from_payload(payload, self._payment_warmup_params_for(base, payload)))
+
+    def create_payment_intent_for(
+        self,
+        tenant_id: str,
+        resource_id: str,
+        start_date: datetime,
+        duration_minutes: int,
+    ) -> Dict[str, Any]:
+        """Booking fast path: create_payment_intent for this slot from the pre-serialized template cache."""
+        self.ensure_logged_in()
+        with self._claimed_payment_base() as base:
+            return self._create_intent(base, self.intent_templates.get(base, tenant_id, resource_id, start_date, duration_minutes))
+
+    def _create_intent(self, base: str, template: IntentTemplate) -> Dict[str, Any]:
+        """POST a prepared intent body to base, warming the app.playtomic.com session per payment_warmup."""
         if base == API_IO_V1:
             logger.info("Using api.playtomic.io for payment (web login token)")
-        payload = dict(data)
-        if self._use_playtomic_io_payment() and self.playtomic_io_user_id:
-            payload["user_id"] = self.playtomic_io_user_id
-        if base == PAYMENT_API_URL:
-            # Warm up app.playtomic.com session
-            cart = payload.get("cart", {}) or {}
-            item = cart.get("requested_item", {}) or {}
-            item_data = item.get("cart_item_data", {}) or {}
-            if item_data:
-                start = item_data.get("start", "")
-                duration_hours = item_data.get("duration", 1.5)
-                duration_mins = int(round(duration_hours * 60))
-                params = {
-                    "type": "CUSTOMER_MATCH",
-                    "tenant_id": item_data.get("tenant_id", ""),
-                    "resource_id": item_data.get("resource_id", ""),
-                    "start": start,
-                    "duration": duration_mins,
-                }
-                try:
-                    self.session.get(
-                        f"{APP_BASE}/payments",
-                        params=params,
-                        headers=self._payment_headers(),
-                        timeout=10,
-                    )
-                except Exception:
-                    pass
-        response = self.session.post(
-            f"{base}/payment_intents",
-            json=payload,
-            headers=self._payment_request_headers(),
-            timeout=10,
-        )
-        response.raise_for_status()
+        warmup = self._warm_before_intent(template)
+        started = time.monotonic()
         try:
-            return response.json()
-        except ValueError:
-            body_preview = (response.text or "")[:500]
-            used = "playtomic.io" if self._use_playtomic_io_payment() else (
-                "api.playtomic.io (web token)" if self._use_web_token_payment() else "app.playtomic.com"
-            )
-            logger.error(
-                "Payment API returned HTML instead of JSON (url=%s, tried %s). "
-                "The server sent the web app page instead of a booking response. See PAYMENT_API_TROUBLESHOOTING.md.",
-                response.url,
-                used,
+            response = self._send(
+                "create_intent",
+                "POST",
+                f"{base}/payment_intents",
+                data=template.body,
+                headers={**self._payment_request_headers(base), "Content-Type": "application/json"},
             )
-            logger.debug("Response body start: %r", body_preview)
-            raise ValueError(
-                "Payment API returned HTML instead of JSON. "
-                "playtomic.io login may have failed and app.playtomic.com returns the web app page. "
-                "See PAYMENT_API_TROUBLESHOOTING.md to capture the real booking request from your browser."
-            ) from None
+            response.raise_for_status()
+            try:
+                intent = self._decode(response)
+            except ValueError:
+                self._note_payment_outcome(base, False, html=True)
+                raise self._html_payment_error(response.url, base, (response.text or "")[:500]) from None
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else 0
+            # A 409 (slot taken) or other slot-level rejection says nothing about the backend
+            if self._backend_failure_status(status):
+                self._note_payment_outcome(base, False, status=status)
+                self._record_payment_backend(base, False, time.monotonic() - started)
+            self.instrumentation.note_outcome("create_intent", {"payment_warmup": warmup}, False)
+            raise
+        except requests.RequestException:
+            self._note_payment_outcome(base, False)
+            self._record_payment_backend(base, False, time.monotonic() - started)
+            self.instrumentation.note_outcome("create_intent", {"payment_warmup": warmup}, False)
+            raise
+        except ValueError:
+            self._record_payment_backend(base, False, time.monotonic() - started)
+            self.instrumentation.note_outcome("create_intent", {"payment_warmup": warmup}, False)
+            raise
+        self.instrumentation.note_outcome("create_intent", {"payment_warmup": warmup}, True)
+        self._note_payment_outcome(base, True)
+        self._record_payment_backend(base, True, time.monotonic() - started)
+        if isinstance(intent, dict) and intent.get("payment_intent_id"):
+            self._intent_bases[intent["payment_intent_id"]] = base
+        return intent
+
+    def warm_payment_session(self, params: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Load the app.playtomic.com /payments page once (pre-release) so the session state it sets up
+        already exists when the first intent POST goes out. params default to any pre-built template's.
+        """
+        params = params or self.intent_templates.any_warmup_params()
+        if not params or not self._payment_warmup_get(params):
+            return False
+        self.payment_session_warmed_at = time.time()
+        return True
+
+    def _payment_warmup_get(self, params: Dict[str, Any]) -> bool:
+        try:
+            self._send("payment_warmup", "GET", f"{APP_BASE}/payments", params=params, headers=self._payment_headers())
+        except requests.RequestException as e:
+            logger.debug("Payment session warm-up failed: %s", e)
+            return False
+        return True
+
+    def _warm_before_intent(self, template: IntentTemplate) -> str:
+        """
+        Apply payment_warmup for an app.playtomic.com intent and return what was done (instrumentation tag):
+        "prerelease" (session already warmed), "concurrent" (GET fired alongside the POST), "inline"
+        (GET awaited before the POST) or "none".
+        """
+        if not template.warmup_params or self.payment_warmup == "off":
+            return "none"
+        if self.payment_warmup == "inline":
+            self._payment_warmup_get(template.warmup_params)
+            return "inline"
+        if self.payment_warmup == "prerelease" and self.payment_session_warmed_at is not None:
+            return "prerelease"
+        self._background_pool().submit(self._payment_warmup_get, template.warmup_params)
+        return "concurrent"
+
+    def _record_payment_backend(self, base: str, ok: bool, latency: float) -> None:
+        """Remember the outcome per account; a failing preferred backend is dropped for the rest of the run."""
+        if not ok and base == self.preferred_payment_base:
+            logger.warning("Known-good payment backend %s failed; using the default order again", base)
+            self.preferred_payment_base = None
+        if self.payment_backends is not None:
+            self.payment_backends.record(self.email, base, ok, latency)
 
     def update_payment_intent(self, payment_intent_id: str, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Update payment intent (e.g. select payment method)."""
+        """Update payment intent (e.g. select payment method) on the backend it was created on."""
         self.ensure_logged_in()
-        base = self._payment_base_url()
-        response = self.session.patch(
+        base = self._intent_base(payment_intent_id)
+        response = self._send(
+            "update_intent",
+            "PATCH",
             f"{base}/payment_intents/{payment_intent_id}",
             json=data,
-            headers=self._payment_request_headers(),
-            timeout=10,
+            headers=self._payment_request_headers(base),
         )
         response.raise_for_status()
-        return response.json()
+        return self._decode(response)
 
     def confirm_reservation(self, payment_intent_id: str) -> Dict[str, Any]:
-        """Confirm the reservation."""
+        """Confirm the reservation on the backend the intent was created on."""
         self.ensure_logged_in()
-        base = self._payment_base_url()
-        response = self.session.post(
+        base = self._intent_base(payment_intent_id)
+        response = self._send(
+            "confirm",
+            "POST",
             f"{base}/payment_intents/{payment_intent_id}/confirmation",
-            headers=self._payment_request_headers(),
-            timeout=10,
+            headers=self._payment_request_headers(base),
         )
         response.raise_for_status()
-        return response.json()
+        return self._decode(response)
 
     def get_matches(self, size: int = 10, sort: str = "start_date,desc") -> List[Dict[str, Any]]:
         """Get list of matches; returns [] when using session auth (api.playtomic.io 404)."""
@@ -274,42 +907,8 @@ class PlaytomicClient:
         url = f"{PAYMENT_API_URL}/matches"
         params = {"size": str(size), "sort": sort, "owner_id": self.user_id or "me"}
         try:
-            response = self.session.get(url, params=params, timeout=10)
+            response = self._send("matches", "GET", url, params=params)
             response.raise_for_status()
             return response.json()
         except Exception:
             return []
-
-    def prepare_payment_intent_data(
-        self,
-        tenant_id: str,
-        resource_id: str,
-        start_date: datetime,
-        duration_minutes: int,
-    ) -> Dict[str, Any]:
-        """Build payload for create_payment_intent (court booking)."""
-        utc_start = start_date.astimezone(pytz.utc)
-        duration_hours = duration_minutes / 60.0
-        return {
-            "allowed_payment_method_types": [
-                "OFFER", "CASH", "MERCHANT_WALLET", "DIRECT",
-                "SWISH", "IDEAL", "BANCONTACT", "PAYTRAIL",
-                "CREDIT_CARD", "QUICK_PAY",
-            ],
-            "user_id": self.user_id,
-            "cart": {
-                "requested_item": {
-                    "cart_item_type": "CUSTOMER_MATCH",
-                    "cart_item_voucher_id": None,
-                    "cart_item_data": {
-                        "supports_split_payment": True,
-                        "number_of_players": 4,
-                        "tenant_id": tenant_id,
-                        "resource_id": resource_id,
-                        "start": utc_start.strftime("%Y-%m-%dT%H:%M:%S"),
-                        "duration": duration_hours,
-                        "match_registrations": [{"user_id": self.user_id, "pay_now": True}],
-                    },
-                }
-            },
-        }
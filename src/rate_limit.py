@@ -0,0 +1,119 @@
+"""
+Process-wide token-bucket rate limiting for Playtomic requests, per host and per endpoint name.
+One limiter is shared by every PlaytomicClient (all accounts and tenants), and it records how long
+requests waited and how many 429s each bucket saw, so limits can be tuned up to the server's tolerance.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from .config import RateLimitConfig
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, at most `burst` stored."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take one token now (the balance may go negative) and return how long the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class _BucketStats:
+    __slots__ = ("requests", "waited", "total_wait", "max_wait", "throttled")
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+
+
+class RateLimiter:
+    """Buckets keyed 'host:<host>' and 'endpoint:<name>'; a request waits for both its buckets."""
+
+    def __init__(self, config: RateLimitConfig) -> None:
+        self._buckets: Dict[str, TokenBucket] = {}
+        for host, limit in config.hosts.items():
+            self._buckets[f"host:{host}"] = TokenBucket(limit.rate, limit.burst)
+        for endpoint, limit in config.endpoints.items():
+            self._buckets[f"endpoint:{endpoint}"] = TokenBucket(limit.rate, limit.burst)
+        self._stats: Dict[str, _BucketStats] = {key: _BucketStats() for key in self._buckets}
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str, endpoint: str) -> float:
+        """Block until host and endpoint buckets allow the request; returns the seconds waited."""
+        keys = [k for k in (f"host:{host}", f"endpoint:{endpoint}") if k in self._buckets]
+        if not keys:
+            return 0.0
+        wait = max(self._buckets[k].reserve() for k in keys)
+        if wait > 0:
+            time.sleep(wait)
+        with self._lock:
+            for k in keys:
+                st = self._stats[k]
+                st.requests += 1
+                if wait > 0:
+                    st.waited += 1
+                    st.total_wait += wait
+                    st.max_wait = max(st.max_wait, wait)
+        return wait
+
+    def note_status(self, host: str, endpoint: str, status: int) -> None:
+        """Count 429 Too Many Requests answers against the buckets of this request."""
+        if status != 429:
+            return
+        with self._lock:
+            for k in (f"host:{host}", f"endpoint:{endpoint}"):
+                if k in self._stats:
+                    self._stats[k].throttled += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                key: {
+                    "requests": st.requests,
+                    "waited": st.waited,
+                    "total_wait_s": round(st.total_wait, 3),
+                    "max_wait_s": round(st.max_wait, 3),
+                    "http_429": st.throttled,
+                }
+                for key, st in self._stats.items()
+            }
+
+    def log_stats(self) -> None:
+        for key, st in self.stats().items():
+            if st["requests"]:
+                logger.info(
+                    "Rate limit %s: %d requests, %d waited (total %.3fs, max %.3fs), %d x 429",
+                    key, st["requests"], st["waited"], st["total_wait_s"], st["max_wait_s"], st["http_429"],
+                )
+
+
+_shared: Optional[RateLimiter] = None
+
+
+def configure(config: RateLimitConfig) -> Optional[RateLimiter]:
+    """Install (or with enabled=False, remove) the process-wide limiter used by all clients."""
+    global _shared
+    _shared = RateLimiter(config) if config.enabled else None
+    return _shared
+
+
+def shared_limiter() -> Optional[RateLimiter]:
+    return _shared
@@ -1,16 +1,18 @@
 """Reservation logic: fetch availability, filter by config, book court."""
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from requests.exceptions import ChunkedEncodingError, HTTPError, RequestException
 
+from .availability_cache import AvailabilityCache
 from .config import BookingConfig
 from .playtomic_client import PlaytomicClient
+from .slot_rules import REJECTED, SlotRules
 from .utils import date
 
 logger = logging.getLogger(__name__)
-DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 # Stop trying more slots after this many failed reservation attempts (so we don't run for minutes)
 MAX_RESERVATION_FAILURES = 3
@@ -71,39 +73,35 @@ class Reserver:
         client: PlaytomicClient,
         config: BookingConfig,
         dry_run: bool = False,
+        availability_cache: Optional[AvailabilityCache] = None,
     ) -> None:
         self.client = client
         self.config = config
         self.dry_run = dry_run
+        self.availability_cache = availability_cache
+        if availability_cache is not None:
+            # The cache is shared by all accounts; this one's release day depends on its booking_days_ahead
+            availability_cache.add_release_day(self._release_day())
         self.reservation_confirmed = False
         self.dry_run_found_slot = False
         self._reservation_failures = 0
+        # PENDING matches this week, fetched once per run (None until a fetch succeeds)
+        self._week_matches: Optional[int] = None
+        # Compiled matching/ranking tables per tenant id (None = no venue-specific hours)
+        self._rules: Dict[Optional[str], SlotRules] = {}
+        # (tenant, resource, start) of every slot with a definitive outcome this run (booked, taken, payment
+        # required); later passes skip them until replan() (new login, a payment circuit opened). Slots that
+        # failed on the transport or the backend stay eligible
+        self._attempted: Set[Tuple[str, str, datetime]] = set()
 
-    def _target_dates_for_day(self, base_date: datetime) -> List[datetime]:
-        """Parse target hour strings into datetimes for the given day."""
-        return [
-            date.parse_datetime(h.strip(), base_date)
-            for h in self.config.target_hours
-        ]
-
-    def _slot_matches_target(self, slot_start: datetime) -> bool:
-        """Check if slot matches target weekday and (unless accept_any_time) target hours."""
-        if self.config.weekdays_only and slot_start.weekday() not in self.config.target_weekdays:
-            return False
-        if getattr(self.config, "accept_any_time", False):
-            return True
-        base = slot_start.replace(hour=0, minute=0, second=0, microsecond=0)
-        targets = self._target_dates_for_day(base)
-        return any(
-            slot_start.hour == t.hour and slot_start.minute == t.minute
-            for t in targets
-        )
-
-    def process_tenant(self, tenant_id: str, tenant_name: str, reservations_per_week: int = 1) -> None:
-        """Check availability for one venue and book if a matching slot is found."""
-        logger.info("Checking venue %s (%s)...", tenant_name or tenant_id, tenant_id)
-        self._reservation_failures = 0
+    def _release_day(self) -> datetime:
+        """Start of the day that opens at release for this account: today + booking_days_ahead."""
+        return date.set_start_of_day(datetime.now()) + timedelta(days=self.config.booking_days_ahead)
 
+    def _count_week_matches(self) -> int:
+        """PENDING matches in the current week; cached so outer-loop attempts don't refetch them."""
+        if self._week_matches is not None:
+            return self._week_matches
         week_matches = 0
         try:
             matches = self.client.get_matches(10, "start_date,desc")
@@ -119,6 +117,55 @@ class Reserver:
                     week_matches += 1
         except Exception as e:
             logger.warning("Could not fetch matches: %s", e)
+            return 0
+        self._week_matches = week_matches
+        return week_matches
+
+    def prepare_intent_templates(self, tenant_id: str) -> int:
+        """
+        Before release: pre-build payment intent bodies for every court and matching start time of the
+        release day (today + booking_days_ahead). Courts and start times come from the last visible day's
+        availability. Returns how many templates were built.
+        """
+        release_day = self._release_day()
+        duration_minutes = int(self.config.duration_hours * 60)
+        entries = self._fetch_day(tenant_id, release_day - timedelta(days=1))
+        resource_ids = {e.get("resource_id") for e in entries if e.get("resource_id")}
+        start_times = {
+            slot.get("start_time")
+            for e in entries
+            for slot in e.get("slots") or []
+            if slot.get("duration") == duration_minutes and slot.get("start_time")
+        }
+        starts = []
+        for start_time in sorted(start_times):
+            try:
+                slot_start = date.slot_start_local(f"{release_day:%Y-%m-%d}", start_time)
+            except ValueError:
+                continue
+            if self._slot_matches_target(slot_start, tenant_id):
+                starts.append(slot_start)
+        base = self.client._payment_base_url()
+        return self.client.intent_templates.prebuild(base, tenant_id, resource_ids, starts, duration_minutes)
+
+    def rules_for(self, tenant_id: Optional[str] = None) -> SlotRules:
+        """Slot rules compiled from this config (and the venue's own hours, if any); built once per tenant."""
+        rules = self._rules.get(tenant_id)
+        if rules is None:
+            tenant = next((t for t in self.config.tenants if t.id == tenant_id), None)
+            rules = self._rules[tenant_id] = SlotRules.compile(self.config, tenant)
+        return rules
+
+    def _slot_matches_target(self, slot_start: datetime, tenant_id: Optional[str] = None) -> bool:
+        """Check if slot matches target weekday and (unless accept_any_time) target hours."""
+        return self.rules_for(tenant_id).matches(slot_start)
+
+    def process_tenant(self, tenant_id: str, tenant_name: str, reservations_per_week: int = 1) -> None:
+        """Check availability for one venue and book if a matching slot is found."""
+        logger.info("Checking venue %s (%s)...", tenant_name or tenant_id, tenant_id)
+        self._reservation_failures = 0
+
+        week_matches = self._count_week_matches()
 
         today = date.set_start_of_day(datetime.now())
         days_ahead = getattr(self.config, "booking_days_ahead", 14)
@@ -133,27 +180,22 @@ class Reserver:
             else:
                 start_date = today + timedelta(days=days_ahead)
             search_limit = today + timedelta(days=min(21, days_ahead + 7))
-        end_date = date.set_end_of_day(start_date)
+        days: List[datetime] = []
+        while start_date < search_limit:
+            days.append(start_date)
+            start_date += timedelta(days=1)
 
-        while start_date < search_limit and not self.reservation_confirmed:
-            if self._reservation_failures >= MAX_RESERVATION_FAILURES:
-                break
-            try:
-                entries = self.client.fetch_availability(tenant_id, start_date, end_date)
-            except HTTPError as err:
-                logger.warning("Availability fetch failed for %s: %s", start_date.date(), err)
-                start_date += timedelta(days=1)
-                end_date += timedelta(days=1)
+        for day, entries in self._iter_day_availability(tenant_id, days):
+            if entries is None:
                 continue
 
-            logger.info("Checking availability for %s...", start_date.strftime("%Y-%m-%d"))
-            for entry in entries:
-                if self._reservation_failures >= MAX_RESERVATION_FAILURES:
-                    break
-                self._process_availability_entry(entry, tenant_id)
-
-            start_date += timedelta(days=1)
-            end_date += timedelta(days=1)
+            logger.info("Checking availability for %s...", day.strftime("%Y-%m-%d"))
+            if self.config.speculative_intents > 1 and not self.dry_run:
+                # Rank the whole day (all courts) and race the best candidates
+                candidates = self._untried(tenant_id, self._day_slots(entries, tenant_id, by_rank=True))
+                self._reserve_speculative(tenant_id, list(candidates))
+                continue
+            self._try_slots(tenant_id, self._untried(tenant_id, self._day_slots(entries, tenant_id)))
 
         if self._reservation_failures >= MAX_RESERVATION_FAILURES and not self.reservation_confirmed:
             logger.warning(
@@ -161,46 +203,135 @@ class Reserver:
                 MAX_RESERVATION_FAILURES,
             )
 
-    def _preferred_rank(self, slot_start: datetime) -> int:
-        """Lower = more preferred. Slots matching preferred_hours get 0."""
-        if not self.config.preferred_hours:
-            return 0
-        key = slot_start.strftime("%H:%M")
-        for i, h in enumerate(self.config.preferred_hours):
-            if h.strip() == key:
-                return i
-        return len(self.config.preferred_hours)
-
-    def _process_availability_entry(self, entry: Dict[str, Any], tenant_id: str) -> None:
-        """Process one availability entry (one resource/date). Try preferred times first."""
+    def _scan_done(self) -> bool:
+        """True once a reservation is confirmed or too many reservation attempts failed."""
+        return self.reservation_confirmed or self._reservation_failures >= MAX_RESERVATION_FAILURES
+
+    def _iter_day_availability(
+        self, tenant_id: str, days: List[datetime]
+    ) -> Iterator[Tuple[datetime, Optional[List[Dict[str, Any]]]]]:
+        """
+        Yield (day, entries) in date order; entries is None when that day's fetch failed.
+        With availability_workers > 1 all days are requested up front in a bounded thread pool,
+        so later days are usually already downloaded when the caller gets to them.
+        With stream_availability (and one worker) entries is an iterator fed while the body downloads.
+        """
+        workers = getattr(self.config, "availability_workers", 1) or 1
+        # Streaming only helps when days are fetched one by one (prefetched days are already downloaded)
+        streaming = getattr(self.config, "stream_availability", False) and workers <= 1
+        pool = ThreadPoolExecutor(max_workers=min(workers, len(days))) if workers > 1 and len(days) > 1 else None
+        try:
+            pending = [pool.submit(self._fetch_day, tenant_id, d) for d in days] if pool else []
+            for i, day in enumerate(days):
+                if self._scan_done():
+                    return
+                try:
+                    if pool:
+                        entries = pending[i].result()
+                    elif streaming:
+                        entries = self._stream_day(tenant_id, day)
+                    else:
+                        entries = self._fetch_day(tenant_id, day)
+                except HTTPError as err:
+                    logger.warning("Availability fetch failed for %s: %s", day.date(), err)
+                    yield day, None
+                    continue
+                yield day, entries
+        finally:
+            if pool:
+                # Booking done (or stopped): don't wait for days we no longer need
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch_day(self, tenant_id: str, day: datetime) -> List[Dict[str, Any]]:
+        """One day's availability, served from the availability cache when it holds a fresh copy."""
+        if self.availability_cache is not None:
+            cached = self.availability_cache.get(tenant_id, day)
+            if cached is not None:
+                return cached
+        entries = self.client.fetch_availability(tenant_id, day, date.set_end_of_day(day))
+        if self.availability_cache is not None:
+            self.availability_cache.put(tenant_id, day, entries)
+        return entries
+
+    def _stream_day(self, tenant_id: str, day: datetime) -> Iterable[Dict[str, Any]]:
+        """Like _fetch_day, but entries are yielded as they download; a complete download fills the cache."""
+        if self.availability_cache is not None:
+            cached = self.availability_cache.get(tenant_id, day)
+            if cached is not None:
+                return cached
+        entries = self.client.stream_availability_day(tenant_id, day)
+        if self.availability_cache is None:
+            return entries
+        return self._cache_when_complete(tenant_id, day, entries)
+
+    def _cache_when_complete(
+        self, tenant_id: str, day: datetime, entries: Iterable[Dict[str, Any]]
+    ) -> Iterator[Dict[str, Any]]:
+        seen: List[Dict[str, Any]] = []
+        for entry in entries:
+            seen.append(entry)
+            yield entry
+        self.availability_cache.put(tenant_id, day, seen)
+
+    def _preferred_rank(self, slot_start: datetime, tenant_id: Optional[str] = None) -> int:
+        """Lower = more preferred: index in preferred_hours, len(preferred_hours) for other times (REJECTED if no match)."""
+        return self.rules_for(tenant_id).rank(slot_start)
+
+    def _matching_slots(self, entry: Dict[str, Any], tenant_id: Optional[str] = None) -> List[Tuple[int, str, datetime]]:
+        """(preferred rank, resource id, local start) of this entry's slots that match the config, best first."""
+        rules = self.rules_for(tenant_id)
         resource_id = entry.get("resource_id")
         start_date_str = entry.get("start_date")
         slots = entry.get("slots") or []
         duration_minutes = int(self.config.duration_hours * 60)
 
-        matches: List[tuple] = []
+        matches: List[Tuple[int, str, datetime]] = []
         for slot in slots:
             if slot.get("duration") != duration_minutes:
                 continue
             slot_time = slot.get("start_time")
             if not slot_time or not start_date_str:
                 continue
-            slot_start_str = f"{start_date_str} {slot_time}"
             try:
-                slot_start = datetime.strptime(slot_start_str, DATE_FORMAT)
+                slot_start = date.slot_start_local(start_date_str, slot_time)
             except ValueError:
                 continue
-            slot_start = date.parse_utc_to_local(slot_start.replace(tzinfo=None))
 
-            if not self._slot_matches_target(slot_start):
+            rank = rules.rank(slot_start)
+            if rank == REJECTED:
                 continue
-            matches.append((self._preferred_rank(slot_start), resource_id, slot_start))
+            matches.append((rank, resource_id, slot_start))
 
         matches.sort(key=lambda x: (x[0], x[2]))
-        for _, rid, slot_start in matches:
-            if self.reservation_confirmed:
-                break
-            if self._reservation_failures >= MAX_RESERVATION_FAILURES:
+        return matches
+
+    def _day_slots(
+        self, entries: Iterable[Dict[str, Any]], tenant_id: str, by_rank: bool = False
+    ) -> Iterable[Tuple[int, str, datetime]]:
+        """
+        Matching slots of one day: entry by entry (response order), each entry best first, or with by_rank
+        all courts by (rank, start). Per entry it is lazy, so a streamed response is matched while it
+        downloads.
+        """
+        slots = (m for entry in entries for m in self._matching_slots(entry, tenant_id))
+        return sorted(slots, key=lambda x: (x[0], x[2])) if by_rank else slots
+
+    def replan(self) -> None:
+        """Forget which slots were settled, so the next pass tries every matching slot again."""
+        self._attempted.clear()
+
+    def _untried(
+        self, tenant_id: str, slots: Iterable[Tuple[int, str, datetime]]
+    ) -> Iterator[Tuple[int, str, datetime]]:
+        """slots minus those with a definitive outcome this run."""
+        for slot in slots:
+            if (tenant_id, slot[1], slot[2]) not in self._attempted:
+                yield slot
+
+    def _try_slots(self, tenant_id: str, slots: Iterable[Tuple[int, str, datetime]]) -> None:
+        """Reserve slots in order until one is confirmed or too many attempts failed."""
+        for _, rid, slot_start in slots:
+            if self._scan_done():
                 break
             readable = slot_start.strftime("%Y %b %d - %H:%M")
             logger.info("Found matching slot: %s", readable)
@@ -220,22 +351,29 @@ class Reserver:
                 resource_id,
             )
             return
+        payment_intent = self._create_intent(tenant_id, resource_id, start_date)
+        if payment_intent is not None:
+            self._confirm_intent(tenant_id, resource_id, payment_intent, start_date)
+
+    def _slot_rejected(self, err: HTTPError) -> bool:
+        """True if err is a verdict on the slot itself (taken, invalid), not on the backend or the network."""
+        status = err.response.status_code if err.response is not None else 0
+        return 400 <= status < 500 and status != 408 and not self.client._backend_failure_status(status)
+
+    def _create_intent(self, tenant_id: str, resource_id: str, start_date: datetime) -> Optional[Dict[str, Any]]:
+        """Create the payment intent for one slot; None (after logging why) if that failed."""
         duration_minutes = int(self.config.duration_hours * 60)
-        data = self.client.prepare_payment_intent_data(
-            tenant_id, resource_id, start_date, duration_minutes
-        )
         try:
-            payment_intent = self.client.create_payment_intent(data)
+            return self.client.create_payment_intent_for(
+                tenant_id, resource_id, start_date, duration_minutes
+            )
         except ValueError as e:
             logger.error("Reservation failed (payment API returned HTML): %s", e)
-            return
         except ChunkedEncodingError as e:
             logger.warning("Reservation failed: server closed connection (%s). Try again.", e)
-            return
-        except RequestException as e:
-            logger.warning("Reservation failed: %s", e)
-            return
         except HTTPError as err:
+            if self._slot_rejected(err):
+                self._attempted.add((tenant_id, resource_id, start_date))
             if err.response is not None and err.response.status_code == 403:
                 logger.error(
                     "Reservation failed: 403 Forbidden. The payment API rejects our request (auth/domain). "
@@ -247,14 +385,23 @@ class Reserver:
                     getattr(err.response, "status_code", ""),
                     getattr(err.response, "text", ""),
                 )
-            return
+        except RequestException as e:
+            logger.warning("Reservation failed: %s", e)
+        return None
+
+    def _confirm_intent(
+        self, tenant_id: str, resource_id: str, payment_intent: Dict[str, Any], start_date: datetime
+    ) -> bool:
+        """Select the 0 EUR payment method and confirm; True (and reservation_confirmed) on success."""
+        slot = (tenant_id, resource_id, start_date)
         try:
             methods = payment_intent.get("available_payment_methods") or []
             zero_eur_methods = [m for m in methods if _is_zero_eur_method(m)]
             if not zero_eur_methods:
                 msg = _payment_required_message(payment_intent)
                 logger.error("SKIP (payment required): %s", msg)
-                return
+                self._attempted.add(slot)
+                return False
             selected = zero_eur_methods[0]
             logger.info("Using 0 EUR payment method: %s", selected.get("name") or "0 EUR option")
             self.client.update_payment_intent(
@@ -267,13 +414,56 @@ class Reserver:
             self.client.confirm_reservation(payment_intent["payment_intent_id"])
             logger.info("Reservation confirmed: %s", start_date.strftime("%Y %b %d - %H:%M"))
             self.reservation_confirmed = True
+            self._attempted.add(slot)
+            return True
         except ChunkedEncodingError:
             logger.warning("Reservation failed: server closed connection. Try again.")
-        except RequestException as e:
-            logger.warning("Reservation failed: %s", e)
         except HTTPError as err:
+            if self._slot_rejected(err):
+                self._attempted.add(slot)
             logger.exception(
                 "Reservation failed: %s %s",
                 getattr(err.response, "status_code", ""),
                 getattr(err.response, "text", ""),
             )
+        except RequestException as e:
+            logger.warning("Reservation failed: %s", e)
+        return False
+
+    def _reserve_speculative(self, tenant_id: str, candidates: List[Tuple[int, str, datetime]]) -> None:
+        """
+        Speculative booking: create intents for the next speculative_intents candidates (best rank first)
+        at once, then confirm the best-ranked one whose intent succeeded, as soon as it and every better
+        candidate have answered. At most one intent is ever confirmed (confirmation stops at the first
+        success, as in serial mode); the other intents are abandoned and expire on the server.
+        """
+        k = self.config.speculative_intents
+        for i in range(0, len(candidates), k):
+            if self._scan_done():
+                break
+            batch = candidates[i:i + k]
+            logger.info(
+                "Racing payment intents for %d slots: %s",
+                len(batch),
+                ", ".join(start.strftime("%Y %b %d - %H:%M") for _, _, start in batch),
+            )
+            pool = ThreadPoolExecutor(max_workers=len(batch), thread_name_prefix="intent")
+            futures = [pool.submit(self._create_intent, tenant_id, rid, start) for _, rid, start in batch]
+            try:
+                for future, (_, rid, start) in zip(futures, batch):
+                    payment_intent = future.result()
+                    if payment_intent is None:
+                        continue
+                    if self._confirm_intent(tenant_id, rid, payment_intent, start):
+                        break
+            finally:
+                # Drop worse-ranked intents that have not started; wait for those in flight so none of them
+                # still touches the client, stores or instrumentation once the scan has moved on
+                pool.shutdown(wait=True, cancel_futures=True)
+            if self.reservation_confirmed:
+                created = sum(1 for f in futures if not f.cancelled() and f.exception() is None and f.result() is not None)
+                abandoned = created - 1
+                if abandoned > 0:
+                    logger.info("Abandoned %d speculative payment intent(s)", abandoned)
+            else:
+                self._reservation_failures += 1
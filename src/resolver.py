@@ -0,0 +1,140 @@
+"""
+In-process DNS cache for a booking run. install() routes socket.getaddrinfo (used by urllib3 and httpx
+alike) through a DnsCache that resolves each (host, port, family, type) once and pins the answer for
+ttl_seconds; prewarm() resolves every host the run will touch during the pre-release wait, so no lookup
+sits in the critical path. Each real lookup is recorded as a "dns" RequestEvent, which keeps resolution
+cost separate from the connect/TLS/request time of the HTTP events.
+"""
+import ipaddress
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from urllib3.util.connection import allowed_gai_family
+
+from .instrumentation import Instrumentation, RequestEvent
+
+logger = logging.getLogger(__name__)
+
+AddrInfo = List[Tuple[Any, ...]]
+CacheKey = Tuple[str, Any, int, int, int, int]
+
+DEFAULT_PORTS = {"https": 443, "http": 80}
+# Upper bound on concurrent lookups in prewarm()
+PREWARM_WORKERS = 8
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host.strip("[]"))
+    except ValueError:
+        return False
+    return True
+
+
+class DnsCache:
+    """getaddrinfo with a TTL cache; a failed re-resolution falls back to the expired answer. Thread-safe."""
+
+    def __init__(self, ttl_seconds: float = 600.0, instrumentation: Optional[Instrumentation] = None) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.instrumentation = instrumentation
+        self.hits = 0
+        self.lookups = 0
+        self._entries: Dict[CacheKey, Tuple[float, AddrInfo]] = {}
+        self._lock = threading.Lock()
+        self._resolve: Callable[..., AddrInfo] = socket.getaddrinfo
+        self._installed = False
+
+    def install(self) -> "DnsCache":
+        """Route socket.getaddrinfo through this cache (process-wide) until uninstall()."""
+        if not self._installed:
+            self._resolve = socket.getaddrinfo
+            socket.getaddrinfo = self.getaddrinfo
+            self._installed = True
+        return self
+
+    def uninstall(self) -> None:
+        if self._installed:
+            socket.getaddrinfo = self._resolve
+            self._installed = False
+
+    def getaddrinfo(
+        self, host: Any, port: Any, family: int = 0, type: int = 0, proto: int = 0, flags: int = 0
+    ) -> AddrInfo:
+        if not isinstance(host, str) or _is_ip(host):
+            return self._resolve(host, port, family, type, proto, flags)
+        key = (host.lower(), port, int(family), int(type), proto, flags)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return list(entry[1])
+        try:
+            result = self._lookup(key)
+        except OSError as e:
+            if entry is None:
+                raise
+            logger.warning("DNS lookup of %s failed (%s); using the previous answer", host, e)
+            return list(entry[1])
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+        return list(result)
+
+    def _lookup(self, key: CacheKey) -> AddrInfo:
+        """Real resolution of key, emitted as a "dns" RequestEvent."""
+        host, port, family, type_, proto, flags = key
+        started_at = time.time()
+        started = time.monotonic()
+        error: Optional[str] = None
+        try:
+            return self._resolve(host, port, family, type_, proto, flags)
+        except OSError as e:
+            error = type(e).__name__
+            raise
+        finally:
+            with self._lock:
+                self.lookups += 1
+            if self.instrumentation is not None:
+                self.instrumentation.record(
+                    RequestEvent("dns", host, "RESOLVE", None, None, time.monotonic() - started, started_at, error=error)
+                )
+
+    def prewarm(self, urls: Iterable[str]) -> int:
+        """
+        Resolve the hosts of urls (as urllib3 and httpx will ask for them) that are not cached yet,
+        concurrently. Returns how many hosts resolved; failures are logged and left to the request.
+        """
+        targets = []
+        for url in urls:
+            parts = urlsplit(url)
+            if not parts.hostname or _is_ip(parts.hostname):
+                continue
+            port = parts.port or DEFAULT_PORTS.get(parts.scheme, 443)
+            if (parts.hostname, port) not in targets:
+                targets.append((parts.hostname, port))
+        if not targets:
+            return 0
+        # urllib3 asks with its allowed address family, httpx (socket.create_connection) with AF_UNSPEC
+        families = {int(allowed_gai_family()), int(socket.AF_UNSPEC)}
+
+        def resolve(target: Tuple[str, int]) -> bool:
+            host, port = target
+            try:
+                for family in families:
+                    self.getaddrinfo(host, port, family, socket.SOCK_STREAM)
+            except OSError as e:
+                logger.warning("Could not pre-resolve %s: %s", host, e)
+                return False
+            return True
+
+        with ThreadPoolExecutor(max_workers=min(PREWARM_WORKERS, len(targets)), thread_name_prefix="dns") as pool:
+            resolved = sum(pool.map(resolve, targets))
+        logger.info("Pre-resolved %d/%d hosts", resolved, len(targets))
+        return resolved
+
+    def log_stats(self) -> None:
+        logger.info("DNS cache: %d lookups, %d cache hits", self.lookups, self.hits)
@@ -0,0 +1,91 @@
+"""
+Per-endpoint retry engine for PlaytomicClient: exponential backoff with jitter, Retry-After on 429/503.
+Idempotent calls retry on any transient failure; create_intent and confirm only when the request
+provably did not reach the server (connect failure) or was explicitly rejected with 429.
+"""
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from .config import RetryConfig, RetryPolicy
+from .http2_adapter import ConnectFailed
+
+_IDEMPOTENT = RetryPolicy()
+_LOGIN = RetryPolicy(max_attempts=2, base_delay=0.2)
+_NON_IDEMPOTENT = RetryPolicy(max_attempts=2, retry_statuses=[429], retry_read_errors=False)
+
+DEFAULT_RETRY_POLICIES: Dict[str, RetryPolicy] = {
+    "availability": _IDEMPOTENT,
+    "matches": _IDEMPOTENT,
+    "payment_warmup": RetryPolicy(max_attempts=1),
+    "keepalive": RetryPolicy(max_attempts=1),
+    "login": _LOGIN,
+    "io_login": _LOGIN,
+    # PATCH with the same body: safe to repeat
+    "update_intent": _IDEMPOTENT,
+    "create_intent": _NON_IDEMPOTENT,
+    "confirm": _NON_IDEMPOTENT,
+}
+
+
+def policies_for(config: RetryConfig) -> Dict[str, RetryPolicy]:
+    """Effective policies: built-in defaults with config overrides; {} (no retries) when disabled."""
+    if not config.enabled:
+        return {}
+    return {**DEFAULT_RETRY_POLICIES, **config.policies}
+
+
+def is_connect_failure(exc: BaseException) -> bool:
+    """True if the request never reached the server (so even a POST can be repeated)."""
+    if isinstance(exc, (requests.ConnectTimeout, ConnectFailed)):
+        return True
+    if isinstance(exc, requests.ConnectionError) and exc.args:
+        reason = exc.args[0]
+        if isinstance(reason, MaxRetryError):
+            reason = reason.reason
+        return isinstance(reason, NewConnectionError)
+    return False
+
+
+def should_retry_exception(policy: RetryPolicy, exc: BaseException) -> bool:
+    if is_connect_failure(exc):
+        return True
+    if not policy.retry_read_errors:
+        return False
+    return isinstance(exc, (requests.Timeout, requests.ConnectionError, requests.exceptions.ChunkedEncodingError))
+
+
+def backoff_delay(policy: RetryPolicy, retry_number: int) -> float:
+    """Delay before retry number `retry_number` (1-based): capped exponential, minus a random jitter share."""
+    delay = min(policy.max_delay, policy.base_delay * (2 ** (retry_number - 1)))
+    return delay * (1 - policy.jitter * random.random())
+
+
+def retry_after_seconds(response: requests.Response) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def response_retry_delay(policy: RetryPolicy, response: requests.Response, retry_number: int) -> Optional[float]:
+    """Delay before retrying this response, or None if it should be returned as is."""
+    if response.status_code not in policy.retry_statuses:
+        return None
+    if policy.honor_retry_after and response.status_code in (429, 503):
+        wait = retry_after_seconds(response)
+        if wait is not None:
+            return wait if wait <= policy.max_retry_after else None
+    return backoff_delay(policy, retry_number)
@@ -1,54 +1,237 @@
 """
 Main booking scheduler: runs at release time with retries for the critical window.
 Can be invoked by GitHub Actions or a local cron.
-Uses max_attempts + retry_delay to cover the first ~5 seconds after slots open.
+Uses max_attempts + retry_delay to re-scan during the first ~5 seconds after slots open;
+transient HTTP failures are retried per request inside the client (src/retry.py).
 """
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
 
 import pytz
 
 from .config import (
     load_booking_config,
-    get_credentials,
     get_credentials_for_account,
+    AccountConfig,
     BookingConfig,
 )
-from .playtomic_client import PlaytomicClient
+from . import rate_limit, retry
+from .availability_cache import AVAILABILITY_CACHE_FILE_NAME, AvailabilityCache
+from .cassette import attach as attach_cassette, open_cassette
+from .instrumentation import Instrumentation
+from .playtomic_client import PAYMENT_API_URL, PlaytomicClient
 from .reserver import Reserver
+from .resolver import DnsCache
+from .payment_backends import PaymentBackendStore
+from .session_store import SessionStore
+from .token_refresher import TokenRefresher
 from .notifications import send_notification
 from .utils import date as date_utils
+from .utils.directory import get_cache_dir
 
 logger = logging.getLogger(__name__)
 
+# Runs starting up to this long after release still count as the release window (late cron start)
+RELEASE_WINDOW_AFTER_SECONDS = 300
+# Last keep-alive goes out this many seconds before release so sockets are fresh at release time
+WARMUP_FINAL_LEAD_SECONDS = 2.0
 
-def _wait_until_release_if_configured(config: BookingConfig) -> None:
-    """If booking_release_time is set, sleep until that time (local or in booking_release_timezone)."""
+
+def _seconds_until_release(config: BookingConfig) -> Optional[float]:
+    """Seconds until booking_release_time today (local or in booking_release_timezone; negative once passed), None if not set."""
     release = config.booking_release_time
     if not release or ":" not in release:
-        return
+        return None
+    now_utc = datetime.now(pytz.UTC)
+    tz_name = getattr(config, "booking_release_timezone", None)
+    if tz_name:
+        tz = pytz.timezone(tz_name)
+        baseline_local = now_utc.astimezone(tz)
+        target_local = date_utils.parse_datetime(release.strip(), baseline_local)
+        target_utc = target_local.astimezone(pytz.UTC) if target_local.tzinfo else tz.localize(target_local).astimezone(pytz.UTC)
+    else:
+        # Runner/local clock: naive 08:30 today (e.g. UTC on GitHub Actions)
+        target_naive = date_utils.parse_datetime(release.strip(), now_utc.replace(tzinfo=None))
+        target_utc = target_naive.replace(tzinfo=pytz.UTC)
+    return (target_utc - now_utc).total_seconds()
+
+
+def _in_release_window(config: BookingConfig) -> bool:
+    """True if this run starts shortly before (or just after) booking_release_time."""
+    try:
+        secs = _seconds_until_release(config)
+    except (ValueError, TypeError) as e:
+        logger.debug("Could not compute release time: %s", e)
+        return False
+    return secs is not None and -RELEASE_WINDOW_AFTER_SECONDS <= secs <= 300
+
+
+def _warm_clients(clients: Sequence[PlaytomicClient], deadline: float) -> float:
+    """
+    One keep-alive round for all clients at once (no request outlives deadline); returns its duration.
+    A failing round is logged and otherwise ignored: the wait for release must not end early.
+    """
+    started = time.monotonic()
+    try:
+        with ThreadPoolExecutor(max_workers=len(clients), thread_name_prefix="warmup") as pool:
+            list(pool.map(lambda client: client.warm_connections(deadline), clients))
+    except Exception as e:
+        logger.warning("Keep-alive round failed: %s", e)
+    return time.monotonic() - started
+
+
+def _wait_until_release_if_configured(
+    config: BookingConfig,
+    clients: Sequence[PlaytomicClient] = (),
+) -> None:
+    """
+    If booking_release_time is set, sleep until that time (local or in booking_release_timezone).
+    With warmup_connections, the given clients open connections to every host they will need and
+    send a keep-alive every warmup_keepalive_seconds (plus one just before release) while waiting.
+    A round is skipped when, going by the previous one, it would still be running at release.
+    """
     try:
-        now_utc = datetime.now(pytz.UTC)
-        tz_name = getattr(config, "booking_release_timezone", None)
-        if tz_name:
-            tz = pytz.timezone(tz_name)
-            baseline_local = now_utc.astimezone(tz)
-            target_local = date_utils.parse_datetime(release.strip(), baseline_local)
-            target_utc = target_local.astimezone(pytz.UTC) if target_local.tzinfo else tz.localize(target_local).astimezone(pytz.UTC)
-        else:
-            # Runner/local clock: naive 08:30 today (e.g. UTC on GitHub Actions)
-            target_naive = date_utils.parse_datetime(release.strip(), now_utc.replace(tzinfo=None))
-            target_utc = target_naive.replace(tzinfo=pytz.UTC)
-
-        if target_utc > now_utc:
-            wait_secs = (target_utc - now_utc).total_seconds()
-            if 0 < wait_secs <= 300:  # at most 5 min
-                logger.info("Waiting %.0fs until release time %s...", wait_secs, release)
-                time.sleep(wait_secs)
-    except (ValueError, TypeError, Exception) as e:
+        wait_secs = _seconds_until_release(config)
+    except (ValueError, TypeError, pytz.UnknownTimeZoneError) as e:
         logger.debug("Could not wait until release: %s", e)
+        return
+    if wait_secs is None or not 0 < wait_secs <= 300:  # at most 5 min
+        return
+    logger.info("Waiting %.0fs until release time %s...", wait_secs, config.booking_release_time)
+    deadline = time.monotonic() + wait_secs
+    if not (clients and config.warmup_connections):
+        time.sleep(wait_secs)
+        return
+    round_seconds = _warm_clients(clients, deadline)
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        if remaining <= WARMUP_FINAL_LEAD_SECONDS:
+            time.sleep(remaining)
+            break
+        time.sleep(min(config.warmup_keepalive_seconds, remaining - WARMUP_FINAL_LEAD_SECONDS))
+        if deadline - time.monotonic() <= round_seconds:
+            logger.debug("Skipping the last keep-alive round; it would not finish before release")
+            continue
+        round_seconds = _warm_clients(clients, deadline)
+
+
+def _build_client(
+    email: str,
+    password: str,
+    config: BookingConfig,
+    instrumentation: Optional[Instrumentation] = None,
+) -> PlaytomicClient:
+    """PlaytomicClient with the transport, retry and payment breaker options from config."""
+    client = PlaytomicClient(
+        email,
+        password,
+        hedge_percentile=config.hedge_percentile if config.hedge_availability else None,
+        hedge_initial_delay=config.hedge_initial_delay_seconds,
+        transport=config.transport,
+        retry_policies=retry.policies_for(config.retry),
+        instrumentation=instrumentation,
+    )
+    client.base_url_overrides = dict(config.base_url_overrides)
+    client.payment_warmup = config.payment_warmup
+    client.availability_workers = config.availability_workers
+    client.payment_breaker_failures = config.payment_breaker_failures
+    client.payment_breaker_reset_seconds = config.payment_breaker_reset_seconds
+    return client
+
+
+def _account_credentials(acc: AccountConfig, config: BookingConfig) -> Tuple[str, str]:
+    """Email and password from the account's env vars; placeholders when replaying (cassettes are redacted)."""
+    try:
+        return get_credentials_for_account(acc.env_email, acc.env_password)
+    except ValueError:
+        if config.cassette.mode != "replay":
+            raise
+        return f"{acc.env_email.lower()}@replay.invalid", "replay"
+
+
+def _session_ttl(config: BookingConfig) -> Optional[float]:
+    """Cap on a cached session's lifetime in seconds (None: until its credentials expire)."""
+    return config.session_cache_ttl_minutes * 60 if config.session_cache_ttl_minutes else None
+
+
+def _login_client(client: PlaytomicClient, config: BookingConfig, store: Optional[SessionStore]) -> None:
+    """
+    Restore a cached session if still valid; otherwise log in (web + playtomic.io) and cache the result.
+    A restored session without a playtomic.io token (that login had failed) retries only that login.
+    """
+    if store is not None:
+        state = store.load(client.email)
+        if state:
+            client.restore_session(state)
+            logger.info("Restored cached session for %s (no login needed)", client.email[:3] + "...")
+            if client.playtomic_io_token is None and client.login_playtomic_io():
+                # Keep the cached web session's expiry; only the playtomic.io token is new
+                store.save(client.email, client.export_session(), state["expires_at"] - time.time())
+            return
+    client.login()
+    # Try playtomic.io login for payment API (Bearer token); if it fails we still use app.playtomic.com
+    client.login_playtomic_io()
+    if store is not None:
+        store.save(client.email, client.export_session(), _session_ttl(config))
+
+
+def _prepare_intent_templates(config: BookingConfig, reservers: Sequence[Tuple[str, Reserver]]) -> None:
+    """Pre-build payment intent bodies for the release day (and warm the payment session) so booking is a lookup and a send."""
+    started = time.monotonic()
+    built = 0
+    for _, reserver in reservers:
+        for tenant in config.tenants:
+            try:
+                built += reserver.prepare_intent_templates(tenant.id)
+            except Exception as e:
+                logger.warning("Could not pre-build payment intents for %s: %s", tenant.name or tenant.id, e)
+        client = reserver.client
+        if config.payment_warmup == "prerelease" and client._payment_base_url() == PAYMENT_API_URL:
+            if client.warm_payment_session():
+                logger.info("Warmed the app.playtomic.com payment session before release")
+    logger.info("Pre-built %d payment intent templates in %.3fs", built, time.monotonic() - started)
+
+
+def _start_token_refresher(
+    config: BookingConfig,
+    clients: Sequence[PlaytomicClient],
+    store: Optional[SessionStore],
+) -> Optional[TokenRefresher]:
+    """Background credential refresh for all logged-in clients; renewed sessions go back to the cache."""
+    if not config.token_refresh or not clients:
+        return None
+
+    def save(client: PlaytomicClient) -> None:
+        if store is not None:
+            store.save(client.email, client.export_session(), _session_ttl(config))
+
+    return TokenRefresher(clients, config.token_refresh_lead_seconds, on_refresh=save).start()
+
+
+def _notify(config: BookingConfig, title: str, message: str, success: bool = True) -> None:
+    """send_notification, except when replaying a cassette (log only)."""
+    if config.cassette.mode == "replay":
+        logger.info("[REPLAY] %s: %s", title, message)
+        return
+    send_notification(title, message, success=success)
+
+
+def _build_availability_cache(config: BookingConfig) -> Optional[AvailabilityCache]:
+    """Availability cache shared by all accounts of this run (None when disabled); each Reserver adds its release day."""
+    if config.availability_cache_ttl_seconds <= 0:
+        return None
+    path = get_cache_dir() / AVAILABILITY_CACHE_FILE_NAME if config.availability_cache_persist else None
+    return AvailabilityCache(
+        default_ttl=config.availability_cache_ttl_seconds,
+        max_entries=config.availability_cache_max_entries,
+        path=path,
+    )
 
 
 def run_booking(
@@ -63,8 +246,6 @@ def run_booking(
     Returns True if a reservation was confirmed (or dry run found a slot).
     """
     config = config or load_booking_config()
-    if not dry_run:
-        _wait_until_release_if_configured(config)
     if not config.tenants or any(t.id == "YOUR_TENANT_ID" for t in config.tenants):
         logger.error(
             "No valid tenant in config. Set your club's tenant ID in config/booking_config.yaml (see HOW_TO_FIND_TENANT_ID.md)"
@@ -77,41 +258,126 @@ def run_booking(
         accounts_to_try = list(config.accounts)
     if not accounts_to_try:
         # Single account: use PLAYTOMIC_EMAIL / PLAYTOMIC_PASSWORD and main config
-        from .config import AccountConfig
         accounts_to_try = [AccountConfig(env_email="PLAYTOMIC_EMAIL", env_password="PLAYTOMIC_PASSWORD", target_weekdays=config.target_weekdays)]
 
-    any_booked = False
-    for acc in accounts_to_try:
-        try:
-            email, password = get_credentials_for_account(acc.env_email, acc.env_password)
-        except ValueError as e:
-            logger.error("%s", e) if not getattr(config, "accounts", None) else logger.warning("Skip account %s: %s", acc.env_email, e)
-            if not getattr(config, "accounts", None) and not dry_run:
-                send_notification("Booking failed", str(e), success=False)
-            continue
+    cassette = open_cassette(config.cassette)
+    if config.cassette.mode == "replay":
+        # Offline replay: leave the real run-to-run caches alone so every replay starts the same
+        config = config.model_copy(
+            update={"session_cache": False, "remember_payment_backend": False, "availability_cache_persist": False}
+        )
+    limiter = rate_limit.configure(config.rate_limits)
+    # One collector for all accounts, dumped when the run ends
+    instrumentation = Instrumentation()
+    dns = DnsCache(config.dns_ttl_seconds, instrumentation) if config.dns_cache else None
+    try:
+        if dns is not None:
+            # Process-wide patch of socket.getaddrinfo; the outer finally always undoes it
+            dns.install()
+
+        # Log in every account before the release wait so no login sits in the critical path
+        session_store = SessionStore() if config.session_cache else None
+        backend_store = PaymentBackendStore() if config.remember_payment_backend else None
+        # In the release window go straight to each account's known-good payment backend;
+        # other runs use the default order and so re-probe the fallbacks
+        in_window = not dry_run and _in_release_window(config)
+        availability_cache = _build_availability_cache(config)
+        reservers: List[Tuple[str, Reserver]] = []
+        for acc in accounts_to_try:
+            try:
+                email, password = _account_credentials(acc, config)
+            except ValueError as e:
+                logger.error("%s", e) if not getattr(config, "accounts", None) else logger.warning("Skip account %s: %s", acc.env_email, e)
+                if not getattr(config, "accounts", None) and not dry_run:
+                    _notify(config, "Booking failed", str(e), success=False)
+                continue
+
+            overrides: dict = {"target_weekdays": acc.target_weekdays}
+            if acc.accept_any_time is not None:
+                overrides["accept_any_time"] = acc.accept_any_time
+            if acc.booking_start_days_ahead is not None:
+                overrides["booking_start_days_ahead"] = acc.booking_start_days_ahead
+            if acc.booking_days_ahead is not None:
+                overrides["booking_days_ahead"] = acc.booking_days_ahead
+            account_config = config.model_copy(update=overrides)
+            client = _build_client(email, password, config, instrumentation)
+            client.instrumentation_tags["account"] = email[:3] + "..."
+            if cassette is not None:
+                attach_cassette(client.session, cassette, config.cassette)
+            client.payment_backends = backend_store
+            if backend_store is not None and in_window:
+                client.preferred_payment_base = backend_store.preferred_base(email)
+                if client.preferred_payment_base:
+                    logger.info("Using known-good payment backend %s", client.preferred_payment_base)
+            try:
+                _login_client(client, config, session_store)
+            except Exception as e:
+                logger.warning("Login failed for account %s: %s", email[:3] + "...", e)
+                continue
+            reservers.append((email, Reserver(client, account_config, dry_run=dry_run, availability_cache=availability_cache)))
+
+        if dns is not None and config.cassette.mode != "replay":
+            dns.prewarm(url for _, r in reservers for url in r.client._urls_to_resolve())
+        refresher = _start_token_refresher(config, [r.client for _, r in reservers], session_store)
+        if not dry_run and config.intent_templates:
+            _prepare_intent_templates(config, reservers)
+        if not dry_run and config.cassette.mode != "replay":
+            _wait_until_release_if_configured(config, [r.client for _, r in reservers])
 
-        overrides: dict = {"target_weekdays": acc.target_weekdays}
-        if acc.accept_any_time is not None:
-            overrides["accept_any_time"] = acc.accept_any_time
-        if acc.booking_start_days_ahead is not None:
-            overrides["booking_start_days_ahead"] = acc.booking_start_days_ahead
-        if acc.booking_days_ahead is not None:
-            overrides["booking_days_ahead"] = acc.booking_days_ahead
-        account_config = config.model_copy(update=overrides)
-        client = PlaytomicClient(email, password)
         try:
-            client.login()
-        except Exception as e:
-            logger.warning("Login failed for account %s: %s", email[:3] + "...", e)
-            continue
-        # Try playtomic.io login for payment API (Bearer token); if it fails we still use app.playtomic.com
-        client.login_playtomic_io()
+            return _book_with_reservers(reservers, config, session_store, max_attempts, retry_delay_seconds, dry_run)
+        finally:
+            if refresher is not None:
+                refresher.stop()
+            if availability_cache is not None:
+                availability_cache.save()
+            if backend_store is not None:
+                backend_store.save()
+            if limiter is not None:
+                limiter.log_stats()
+            if dns is not None:
+                dns.log_stats()
+            instrumentation.log_summary()
+            if config.request_timings_file:
+                instrumentation.dump(Path(config.request_timings_file))
+            if cassette is not None and config.cassette.mode == "record":
+                cassette.save()
+    finally:
+        if dns is not None:
+            dns.uninstall()
 
-        reserver = Reserver(client, account_config, dry_run=dry_run)
+
+def _book_with_reservers(
+    reservers: List[Tuple[str, Reserver]],
+    config: BookingConfig,
+    session_store: Optional[SessionStore],
+    max_attempts: int,
+    retry_delay_seconds: float,
+    dry_run: bool,
+) -> bool:
+    """
+    Attempt loop over the logged-in accounts; True once one books (or a dry run finds a slot).
+    Later passes poll availability (only the release day bypasses the availability cache) and skip
+    slots already settled (booked, taken, payment required); those are tried again only after a
+    structural change: the session needed a new login or a payment backend's circuit opened.
+    """
+    any_booked = False
+    for email, reserver in reservers:
+        client = reserver.client
+        breaker_opens = client.payment_breaker_opens
         for attempt in range(1, max_attempts + 1):
             if reserver.reservation_confirmed:
                 break
-            reserver.client.login()
+            if attempt > 1:
+                replan = client.needs_login or client.payment_breaker_opens != breaker_opens
+                if client.needs_login and client.refresh_credentials():
+                    # Normally the TokenRefresher has already renewed a session that got a 401
+                    if session_store is not None:
+                        session_store.save(email, client.export_session(), _session_ttl(config))
+                if replan:
+                    logger.info("Session or payment backend changed; retrying every matching slot")
+                    reserver.replan()
+                breaker_opens = client.payment_breaker_opens
             for tenant in config.tenants:
                 if reserver.reservation_confirmed:
                     break
@@ -125,7 +391,8 @@ def run_booking(
                 if dry_run:
                     logger.info("[DRY RUN] Found at least one matching slot (see logs above). No booking made.")
                 else:
-                    send_notification(
+                    _notify(
+                        config,
                         "Court booked",
                         "A court was successfully reserved via Playtomic. Check the app.",
                         success=True,
@@ -140,7 +407,8 @@ def run_booking(
         return True
 
     if not dry_run:
-        send_notification(
+        _notify(
+            config,
             "No court booked",
             f"Tried {max_attempts} times; no matching slot was available or booking failed.",
             success=False,
@@ -154,8 +422,22 @@ def run_booking(
     return False
 
 
+def _cli_value(argv: Sequence[str], flag: str) -> Optional[str]:
+    """Value of `--flag VALUE` or `--flag=VALUE` in argv, or None."""
+    for i, arg in enumerate(argv):
+        if arg == flag and i + 1 < len(argv):
+            return argv[i + 1]
+        if arg.startswith(flag + "="):
+            return arg[len(flag) + 1:]
+    return None
+
+
 def main() -> None:
-    """Entry point for CLI or GitHub Actions. Use --dry-run to test without booking."""
+    """
+    Entry point for CLI or GitHub Actions. Use --dry-run to test without booking.
+    --record PATH saves the run's HTTP traffic to a cassette; --replay PATH runs offline against one
+    (add --emulate-latency to sleep for the recorded response times).
+    """
     import sys
     logging.basicConfig(
         level=logging.INFO,
@@ -164,7 +446,19 @@ def main() -> None:
     dry_run = "--dry-run" in sys.argv or "-n" in sys.argv
     if dry_run:
         logger.info("Running in DRY RUN mode: will not book, only check login and availability.")
-    run_booking(max_attempts=5, retry_delay_seconds=1.0, dry_run=dry_run)
+    config = None
+    record_path, replay_path = _cli_value(sys.argv, "--record"), _cli_value(sys.argv, "--replay")
+    if record_path or replay_path:
+        config = load_booking_config()
+        cassette = config.cassette.model_copy(
+            update={
+                "mode": "replay" if replay_path else "record",
+                "path": replay_path or record_path,
+                "emulate_latency": "--emulate-latency" in sys.argv or config.cassette.emulate_latency,
+            }
+        )
+        config = config.model_copy(update={"cassette": cassette})
+    run_booking(config, max_attempts=5, retry_delay_seconds=1.0, dry_run=dry_run)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,93 @@
+"""
+On-disk cache of authenticated Playtomic sessions, keyed by account.
+Lets a run restore cookies and tokens instantly instead of logging in again after the release wait.
+"""
+import base64
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .utils.json_file import read_json_dict, write_private_json
+
+logger = logging.getLogger(__name__)
+
+SESSION_FILE_NAME = "sessions.json"
+# Lifetime of a cached session whose tokens and cookies carry no expiry of their own
+DEFAULT_SESSION_TTL_SECONDS = 6 * 3600
+
+
+def account_key(email: str) -> str:
+    """Stable key for an account that does not store the email itself."""
+    return hashlib.sha256(email.strip().lower().encode("utf-8")).hexdigest()[:32]
+
+
+def token_expiry(token: Optional[str]) -> Optional[float]:
+    """Unix 'exp' claim of a JWT (not verified), or None if the token is not a JWT."""
+    if not token or token.count(".") != 2:
+        return None
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload.encode("ascii")))
+        exp = claims.get("exp")
+        return float(exp) if exp is not None else None
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+class SessionStore:
+    """JSON file of {account_key: session state}; each state carries an expires_at timestamp."""
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        if path is None:
+            from .utils.directory import get_cache_dir
+            path = get_cache_dir() / SESSION_FILE_NAME
+        self.path = Path(path)
+
+    def _read_all(self) -> Dict[str, Any]:
+        return read_json_dict(self.path)
+
+    def _write_all(self, data: Dict[str, Any]) -> None:
+        write_private_json(self.path, data)
+
+    def load(self, email: str, min_valid_seconds: float = 0.0) -> Optional[Dict[str, Any]]:
+        """Stored state for this account if it is still valid for at least min_valid_seconds, else None."""
+        state = self._read_all().get(account_key(email))
+        if not state:
+            return None
+        expires_at = state.get("expires_at") or 0
+        if expires_at - time.time() <= min_valid_seconds:
+            return None
+        return state
+
+    def save(self, email: str, state: Dict[str, Any], ttl_seconds: Optional[float] = None) -> None:
+        """
+        Store state; expires at the earliest token exp claim or cookie expiry (now +
+        DEFAULT_SESSION_TTL_SECONDS if none is known), and no later than now + ttl_seconds if given.
+        """
+        now = time.time()
+        candidates = []
+        for token_field in ("access_token", "playtomic_io_token"):
+            exp = token_expiry(state.get(token_field))
+            if exp:
+                candidates.append(exp)
+        candidates.extend(c["expires"] for c in state.get("cookies", []) if c.get("expires"))
+        if not candidates:
+            candidates.append(now + DEFAULT_SESSION_TTL_SECONDS)
+        if ttl_seconds is not None:
+            candidates.append(now + ttl_seconds)
+        state = dict(state, saved_at=now, expires_at=min(candidates))
+        data = self._read_all()
+        data[account_key(email)] = state
+        try:
+            self._write_all(data)
+        except OSError as e:
+            logger.warning("Could not write session cache %s: %s", self.path, e)
+
+    def delete(self, email: str) -> None:
+        data = self._read_all()
+        if data.pop(account_key(email), None) is not None:
+            self._write_all(data)
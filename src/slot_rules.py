@@ -0,0 +1,88 @@
+"""
+Slot-matching rules compiled into lookup tables. A SlotRules holds, for every weekday x minute of the
+day (7 x 1440), the preferred rank of a slot starting then, or REJECTED. Reserver compiles one per
+(account config, tenant) and then matches and ranks each slot with a single list index instead of
+re-parsing target_hours and preferred_hours for every slot.
+
+Hour entries are start times ("19:00") or inclusive windows of start times ("18:00-21:30").
+Windows come, most specific first, from the tenant's weekday_hours, the tenant's target_hours,
+the config's weekday_hours and finally the config's target_hours.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .config import BookingConfig, TenantConfig
+
+MINUTES_PER_DAY = 24 * 60
+# Table value for a slot that does not match the rules
+REJECTED = -1
+
+
+def _minute_of_day(value: str) -> int:
+    """'HH:MM' or 'HH:MM:SS' as minutes after midnight (seconds are ignored, as in slot matching)."""
+    parts = value.strip().split(":")
+    if len(parts) < 2:
+        raise ValueError("Time must be in HH:MM or HH:MM:SS format.")
+    hour, minute = int(parts[0]), int(parts[1])
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(f"Invalid time {value!r}")
+    return hour * 60 + minute
+
+
+def parse_window(entry: str) -> Tuple[int, int]:
+    """'19:00' -> (1140, 1140); '18:00-21:30' -> (1080, 1290). Both ends are inclusive start minutes."""
+    if "-" in entry:
+        start, end = entry.split("-", 1)
+        first, last = _minute_of_day(start), _minute_of_day(end)
+        if last < first:
+            raise ValueError(f"Time window {entry!r} ends before it starts")
+        return first, last
+    minute = _minute_of_day(entry)
+    return minute, minute
+
+
+class SlotRules:
+    """Compiled accept/rank table: rank(slot_start) is the preferred rank (0 = best) or REJECTED."""
+
+    __slots__ = ("_table",)
+
+    def __init__(self, table: List[int]) -> None:
+        if len(table) != 7 * MINUTES_PER_DAY:
+            raise ValueError("SlotRules table must have 7 x 1440 entries")
+        self._table = table
+
+    @classmethod
+    def compile(cls, config: BookingConfig, tenant: Optional[TenantConfig] = None) -> "SlotRules":
+        """Table for config (weekdays, target/weekday hours, accept_any_time, preferred_hours) at tenant."""
+        preferred: Dict[int, int] = {}
+        for i, hour in enumerate(config.preferred_hours):
+            preferred.setdefault(_minute_of_day(hour), i)
+        default_rank = len(config.preferred_hours)
+        ranks = [preferred.get(minute, default_rank) for minute in range(MINUTES_PER_DAY)]
+
+        table = [REJECTED] * (7 * MINUTES_PER_DAY)
+        for weekday in range(7):
+            if config.weekdays_only and weekday not in config.target_weekdays:
+                continue
+            offset = weekday * MINUTES_PER_DAY
+            if config.accept_any_time:
+                table[offset:offset + MINUTES_PER_DAY] = ranks
+                continue
+            for first, last in cls._windows(config, tenant, weekday):
+                table[offset + first:offset + last + 1] = ranks[first:last + 1]
+        return cls(table)
+
+    @staticmethod
+    def _windows(config: BookingConfig, tenant: Optional[TenantConfig], weekday: int) -> Iterable[Tuple[int, int]]:
+        hours: Optional[List[str]] = None
+        if tenant is not None:
+            hours = tenant.weekday_hours.get(weekday, tenant.target_hours)
+        if hours is None:
+            hours = config.weekday_hours.get(weekday, config.target_hours)
+        return [parse_window(h) for h in hours]
+
+    def rank(self, slot_start: datetime) -> int:
+        return self._table[slot_start.weekday() * MINUTES_PER_DAY + slot_start.hour * 60 + slot_start.minute]
+
+    def matches(self, slot_start: datetime) -> bool:
+        return self.rank(slot_start) != REJECTED
@@ -0,0 +1,394 @@
+"""
+Local stand-in for the Playtomic endpoints the client uses, for load and latency testing on one machine:
+web-app login, clubs/availability, playtomic.io auth, payment_intents (create, PATCH, confirmation) and
+matches. Latency per endpoint follows a configurable distribution, slots are contended between
+concurrent bookers (first intent holds a slot, a second one gets 409), and the release day's slots only
+appear at a scheduled release moment. Point clients at it with base_url_overrides (see overrides()).
+
+    python -m src.standin_server --port 8765 --release-in 20 --latency availability=lognormal:80:0.4
+"""
+import argparse
+import base64
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from datetime import date as date_type, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Origins the client talks to; all of them are served by one stand-in server
+PLAYTOMIC_ORIGINS = (
+    "https://playtomic.com",
+    "https://app.playtomic.com",
+    "https://playtomic.io",
+    "https://api.playtomic.io",
+)
+SLOT_DURATIONS = (60, 90, 120)
+TOKEN_TTL_SECONDS = 3600
+
+
+class Latency:
+    """Response delay distribution: fixed:MS, uniform:LO_MS:HI_MS or lognormal:MEDIAN_MS:SIGMA."""
+
+    def __init__(self, kind: str = "fixed", a: float = 0.0, b: float = 0.0) -> None:
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution {kind!r}")
+        self.kind = kind
+        self.a = a
+        self.b = b
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        kind, *params = spec.split(":")
+        values = [float(p) for p in params] + [0.0, 0.0]
+        return cls(kind, values[0], values[1])
+
+    def sample(self) -> float:
+        """Delay in seconds."""
+        if self.kind == "uniform":
+            ms = random.uniform(self.a, self.b)
+        elif self.kind == "lognormal":
+            ms = random.lognormvariate(0.0, self.b) * self.a
+        else:
+            ms = self.a
+        return max(0.0, ms) / 1000.0
+
+
+def _fake_jwt(subject: str, ttl: float) -> str:
+    """Unsigned JWT-shaped token with an exp claim (enough for session_store.token_expiry)."""
+
+    def part(data: Dict[str, Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+    return f"{part({'alg': 'none'})}.{part({'sub': subject, 'exp': int(time.time() + ttl)})}.standin"
+
+
+class StandinState:
+    """Courts, holds and bookings shared by all request threads."""
+
+    def __init__(
+        self,
+        courts: int = 4,
+        open_hour: int = 7,
+        close_hour: int = 22,
+        release_day: Optional[date_type] = None,
+        release_at: Optional[float] = None,
+        hold_seconds: float = 60.0,
+        latencies: Optional[Dict[str, Latency]] = None,
+    ) -> None:
+        self.courts = [f"court-{i + 1}" for i in range(courts)]
+        self.open_hour = open_hour
+        self.close_hour = close_hour
+        self.release_day = release_day
+        self.release_at = release_at
+        self.hold_seconds = hold_seconds
+        self.latencies = latencies or {}
+        self._users: Dict[str, str] = {}  # token -> email
+        # (tenant, resource) -> list of (start, end, intent_id)
+        self._taken: Dict[Tuple[str, str], List[Tuple[datetime, datetime, str]]] = {}
+        self._intents: Dict[str, Dict[str, Any]] = {}
+        self.confirmations: List[Dict[str, Any]] = []
+        self.conflicts = 0
+        self._lock = threading.Lock()
+
+    def delay(self, endpoint: str) -> None:
+        latency = self.latencies.get(endpoint) or self.latencies.get("default")
+        if latency is not None:
+            time.sleep(latency.sample())
+
+    def released(self, day: date_type) -> bool:
+        if self.release_day is None or day != self.release_day or self.release_at is None:
+            return True
+        return time.time() >= self.release_at
+
+    def login(self, email: str) -> Dict[str, Any]:
+        token = _fake_jwt(email, TOKEN_TTL_SECONDS)
+        with self._lock:
+            self._users[token] = email
+        return {"access_token": token, "user_id": f"user-{uuid.uuid5(uuid.NAMESPACE_URL, email).hex[:8]}"}
+
+    def user_for(self, token: str) -> Optional[str]:
+        with self._lock:
+            return self._users.get(token)
+
+    def _expire_holds(self, now: float) -> None:
+        for intent_id, intent in list(self._intents.items()):
+            if intent["status"] == "HELD" and intent["expires_at"] <= now:
+                intent["status"] = "EXPIRED"
+                key = (intent["tenant_id"], intent["resource_id"])
+                self._taken[key] = [t for t in self._taken.get(key, []) if t[2] != intent_id]
+
+    def _free(self, key: Tuple[str, str], start: datetime, end: datetime) -> bool:
+        return all(end <= s or start >= e for s, e, _ in self._taken.get(key, []))
+
+    def availability(self, tenant_id: str, day: date_type) -> List[Dict[str, Any]]:
+        if not self.released(day):
+            return []
+        with self._lock:
+            self._expire_holds(time.time())
+            result = []
+            for resource_id in self.courts:
+                key = (tenant_id, resource_id)
+                slots = []
+                for minute in range(self.open_hour * 60, self.close_hour * 60, 30):
+                    start = datetime.combine(day, datetime.min.time()) + timedelta(minutes=minute)
+                    for duration in SLOT_DURATIONS:
+                        end = start + timedelta(minutes=duration)
+                        if end.hour * 60 + end.minute > self.close_hour * 60 or end.date() != day:
+                            continue
+                        if self._free(key, start, end):
+                            slots.append({"start_time": start.strftime("%H:%M:%S"), "duration": duration, "price": "0 EUR"})
+                result.append({"resource_id": resource_id, "start_date": day.isoformat(), "slots": slots})
+            return result
+
+    def create_intent(self, email: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        item = ((body.get("cart") or {}).get("requested_item") or {}).get("cart_item_data") or {}
+        try:
+            tenant_id, resource_id = item["tenant_id"], item["resource_id"]
+            start = datetime.strptime(item["start"], "%Y-%m-%dT%H:%M:%S")
+            end = start + timedelta(minutes=int(round(float(item["duration"]) * 60)))
+        except (KeyError, TypeError, ValueError):
+            return 400, {"error": "invalid cart"}
+        if resource_id not in self.courts or not self.released(start.date()):
+            return 404, {"error": "slot not available"}
+        key = (tenant_id, resource_id)
+        now = time.time()
+        with self._lock:
+            self._expire_holds(now)
+            if not self._free(key, start, end):
+                self.conflicts += 1
+                return 409, {"error": "slot already taken"}
+            intent_id = uuid.uuid4().hex
+            self._taken.setdefault(key, []).append((start, end, intent_id))
+            self._intents[intent_id] = {
+                "email": email,
+                "tenant_id": tenant_id,
+                "resource_id": resource_id,
+                "start": start,
+                "status": "HELD",
+                "created_at": now,
+                "expires_at": now + self.hold_seconds,
+            }
+        return 200, self._intent_body(intent_id)
+
+    @staticmethod
+    def _intent_body(intent_id: str) -> Dict[str, Any]:
+        return {
+            "payment_intent_id": intent_id,
+            "status": "REQUIRES_PAYMENT_METHOD",
+            "total_amount": 0,
+            "currency": "EUR",
+            "available_payment_methods": [
+                {"payment_method_id": "AT_THE_CLUB", "name": "Pay at the club", "amount": 0},
+            ],
+        }
+
+    def update_intent(self, intent_id: str) -> Tuple[int, Dict[str, Any]]:
+        with self._lock:
+            intent = self._intents.get(intent_id)
+            if intent is None or intent["status"] != "HELD":
+                return 404, {"error": "unknown or expired payment intent"}
+        return 200, self._intent_body(intent_id)
+
+    def confirm(self, intent_id: str) -> Tuple[int, Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            self._expire_holds(now)
+            intent = self._intents.get(intent_id)
+            if intent is None or intent["status"] != "HELD":
+                self.conflicts += 1
+                return 409, {"error": "payment intent expired or unknown"}
+            intent["status"] = "CONFIRMED"
+            record = {
+                "email": intent["email"],
+                "resource_id": intent["resource_id"],
+                "start": intent["start"].strftime("%Y-%m-%dT%H:%M:%S"),
+                "intent_seconds": round(now - intent["created_at"], 4),
+                "after_release_seconds": round(now - self.release_at, 4) if self.release_at else None,
+            }
+            self.confirmations.append(record)
+        logger.info("Confirmed %s %s for %s", record["resource_id"], record["start"], record["email"])
+        return 200, {"payment_intent_id": intent_id, "status": "SUCCEEDED"}
+
+    def matches(self, email: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {"status": "PENDING", "start_date": i["start"].strftime("%Y-%m-%dT%H:%M:%S"), "resource_id": i["resource_id"]}
+                for i in self._intents.values()
+                if i["email"] == email and i["status"] == "CONFIRMED"
+            ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            after = sorted(c["after_release_seconds"] for c in self.confirmations if c["after_release_seconds"] is not None)
+            return {
+                "release_at": self.release_at,
+                "confirmations": list(self.confirmations),
+                "conflicts": self.conflicts,
+                "first_confirmation_after_release_s": after[0] if after else None,
+            }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "StandinServer"
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real hosts
+    # Headers and body go out in separate writes; without TCP_NODELAY each response waits on Nagle + delayed ACK
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("%s %s", self.address_string(), format % args)
+
+    def _body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        try:
+            data = json.loads(self.rfile.read(length))
+        except ValueError:
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _reply(self, status: int, data: Any, content_type: str = "application/json") -> None:
+        body = data if isinstance(data, bytes) else json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _user(self) -> Optional[str]:
+        auth = self.headers.get("Authorization") or ""
+        return self.server.state.user_for(auth[7:]) if auth.startswith("Bearer ") else None
+
+    def _route(self) -> None:
+        state = self.server.state
+        parts = urlsplit(self.path)
+        path, query = parts.path.rstrip("/"), parse_qs(parts.query)
+        method = self.command
+        if method == "HEAD":
+            return self._reply(200, b"", "text/html")
+        if path == "/__standin/stats":
+            return self._reply(200, state.stats())
+        if method == "POST" and path in ("/api/web-app/login", "/api/v3/auth/login"):
+            state.delay("login" if path.startswith("/api/web-app") else "io_login")
+            email = self._body().get("email")
+            if not email:
+                return self._reply(400, {"error": "email required"})
+            return self._reply(200, state.login(email))
+        if method == "GET" and path == "/api/clubs/availability":
+            state.delay("availability")
+            try:
+                day = datetime.strptime(query["date"][0], "%Y-%m-%d").date()
+                tenant_id = query["tenant_id"][0]
+            except (KeyError, ValueError):
+                return self._reply(400, {"error": "tenant_id and date required"})
+            return self._reply(200, state.availability(tenant_id, day))
+        if method == "GET" and path == "/payments":
+            state.delay("payment_warmup")
+            return self._reply(200, b"<html></html>", "text/html")
+        # Payment API: /api/v1/... (playtomic.io, app.playtomic.com) or /v1/... (api.playtomic.io)
+        api_path = path[4:] if path.startswith("/api/v1/") else path
+        if not api_path.startswith("/v1/"):
+            return self._reply(404, {"error": "not found"})
+        email = self._user()
+        if email is None:
+            return self._reply(401, {"error": "unauthorized"})
+        segments = api_path.split("/")[2:]
+        if method == "GET" and segments == ["matches"]:
+            state.delay("matches")
+            return self._reply(200, state.matches(email))
+        if segments[:1] == ["payment_intents"]:
+            if method == "POST" and len(segments) == 1:
+                state.delay("create_intent")
+                return self._reply(*state.create_intent(email, self._body()))
+            if method == "PATCH" and len(segments) == 2:
+                state.delay("update_intent")
+                self._body()
+                return self._reply(*state.update_intent(segments[1]))
+            if method == "POST" and len(segments) == 3 and segments[2] == "confirmation":
+                state.delay("confirm")
+                return self._reply(*state.confirm(segments[1]))
+        return self._reply(404, {"error": "not found"})
+
+    do_GET = do_POST = do_PATCH = do_HEAD = _route
+
+
+class StandinServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer around a StandinState; start() serves from a daemon thread."""
+
+    daemon_threads = True
+
+    def __init__(self, state: StandinState, host: str = "127.0.0.1", port: int = 0) -> None:
+        super().__init__((host, port), _Handler)
+        self.state = state
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def overrides(self) -> Dict[str, str]:
+        """base_url_overrides that send every Playtomic origin to this server."""
+        return {origin: self.base_url for origin in PLAYTOMIC_ORIGINS}
+
+    def start(self) -> "StandinServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="standin-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local Playtomic stand-in server for load/latency tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--courts", type=int, default=4)
+    parser.add_argument("--release-in", type=float, default=None, help="Seconds until the release day's slots appear")
+    parser.add_argument("--release-days-ahead", type=int, default=14, help="Which day is released (today + N)")
+    parser.add_argument("--hold-seconds", type=float, default=60.0, help="How long an unconfirmed intent holds its slot")
+    parser.add_argument(
+        "--latency",
+        action="append",
+        default=[],
+        metavar="ENDPOINT=SPEC",
+        help="e.g. availability=lognormal:80:0.4, create_intent=uniform:50:150, default=fixed:20",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    latencies = {}
+    for item in args.latency:
+        endpoint, _, spec = item.partition("=")
+        latencies[endpoint] = Latency.parse(spec)
+    release_at = time.time() + args.release_in if args.release_in is not None else None
+    state = StandinState(
+        courts=args.courts,
+        release_day=date_type.today() + timedelta(days=args.release_days_ahead) if release_at else None,
+        release_at=release_at,
+        hold_seconds=args.hold_seconds,
+        latencies=latencies,
+    )
+    server = StandinServer(state, args.host, args.port)
+    overrides = "".join(f'\n  "{origin}": "{target}"' for origin, target in server.overrides().items())
+    logger.info("Stand-in Playtomic on %s; add to booking_config.yaml:\nbase_url_overrides:%s", server.base_url, overrides)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info("Stats: %s", json.dumps(state.stats()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Background renewal of client credentials. One daemon thread watches the web and playtomic.io expiry of
+every client (JWT exp claims, session cookie expiry) and logs in again `lead_seconds` before they run
+out, or right after a request got 401, so booking calls never wait on authentication.
+"""
+import logging
+import threading
+import time
+from typing import Callable, List, Optional, Sequence
+
+from .playtomic_client import PlaytomicClient
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the sleep between checks (also covers credentials without a known expiry)
+MAX_CHECK_INTERVAL = 60.0
+# Minimum gap between two refreshes of one client (after success or failure), so short-lived
+# tokens or a failing login cannot turn into a login loop
+MIN_REFRESH_GAP = 15.0
+
+
+class TokenRefresher:
+    """Keeps the credentials of `clients` fresh from a daemon thread; start() / stop()."""
+
+    def __init__(
+        self,
+        clients: Sequence[PlaytomicClient],
+        lead_seconds: float = 300.0,
+        on_refresh: Optional[Callable[[PlaytomicClient], None]] = None,
+    ) -> None:
+        self.clients: List[PlaytomicClient] = list(clients)
+        self.lead_seconds = lead_seconds
+        self.on_refresh = on_refresh
+        self.refreshes = 0
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._not_before = {id(client): 0.0 for client in self.clients}
+
+    def start(self) -> "TokenRefresher":
+        for client in self.clients:
+            client.on_unauthorized = self.wake
+        self._thread = threading.Thread(target=self._run, name="token-refresher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        for client in self.clients:
+            if client.on_unauthorized == self.wake:
+                client.on_unauthorized = None
+
+    def wake(self) -> None:
+        """Check now (called by a client after a 401)."""
+        self._wake.set()
+
+    def _next_check_in(self) -> float:
+        """Seconds until the earliest client enters its refresh window (capped at MAX_CHECK_INTERVAL)."""
+        now = time.time()
+        wait = MAX_CHECK_INTERVAL
+        for client in self.clients:
+            not_before = self._not_before[id(client)]
+            if not_before > now:
+                wait = min(wait, not_before - now)
+                continue
+            expires_at = client.credentials_expire_at()
+            if expires_at is not None:
+                wait = min(wait, max(0.0, expires_at - self.lead_seconds - now))
+        return max(wait, 0.5)
+
+    def _refresh_due(self) -> None:
+        now = time.time()
+        for client in self.clients:
+            if self._not_before[id(client)] > now:
+                continue
+            try:
+                if client.refresh_credentials(self.lead_seconds):
+                    self._not_before[id(client)] = now + MIN_REFRESH_GAP
+                    self.refreshes += 1
+                    logger.info("Refreshed credentials for %s in the background", client.email[:3] + "...")
+                    if self.on_refresh is not None:
+                        self.on_refresh(client)
+            except Exception as e:
+                self._not_before[id(client)] = now + MIN_REFRESH_GAP
+                logger.warning("Background login for %s failed: %s", client.email[:3] + "...", e)
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._refresh_due()
+            self._wake.wait(self._next_check_in())
+            self._wake.clear()
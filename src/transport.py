@@ -0,0 +1,106 @@
+"""requests transport tuning: pooled adapters with socket options, built from TransportConfig."""
+import logging
+import socket
+from typing import Any, Callable, List, Tuple
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from .config import TransportConfig
+from .http2_adapter import Http2Adapter
+
+logger = logging.getLogger(__name__)
+
+
+def socket_options(transport: TransportConfig) -> List[Tuple[int, int, int]]:
+    """urllib3 socket options for TCP_NODELAY and keepalive (platform-specific knobs only where supported)."""
+    options = [opt for opt in HTTPConnection.default_socket_options if opt[1] != socket.TCP_NODELAY]
+    options.append((socket.IPPROTO_TCP, socket.TCP_NODELAY, 1 if transport.tcp_nodelay else 0))
+    if transport.tcp_keepalive:
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        # Linux: TCP_KEEPIDLE; macOS: TCP_KEEPALIVE is the idle time
+        idle_opt = getattr(socket, "TCP_KEEPIDLE", None) or getattr(socket, "TCP_KEEPALIVE", None)
+        if idle_opt is not None:
+            options.append((socket.IPPROTO_TCP, idle_opt, transport.keepalive_idle_seconds))
+        if hasattr(socket, "TCP_KEEPINTVL"):
+            options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, transport.keepalive_interval_seconds))
+        if hasattr(socket, "TCP_KEEPCNT"):
+            options.append((socket.IPPROTO_TCP, socket.TCP_KEEPCNT, transport.keepalive_count))
+    return options
+
+
+class TunedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools open sockets with the given socket options."""
+
+    def __init__(self, socket_options: List[Tuple[int, int, int]], **kwargs: Any) -> None:
+        self.socket_options = socket_options
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        kwargs["socket_options"] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, *args: Any, **kwargs: Any) -> Any:
+        kwargs["socket_options"] = self.socket_options
+        return super().proxy_manager_for(*args, **kwargs)
+
+
+class RoutingAdapter(BaseAdapter):
+    """
+    Sends through inner with the URL rewritten by route (base_url_overrides). The session, and a cassette
+    adapter wrapped around this one, keep seeing the original URL: cookies stay on the real hosts and
+    recordings replay with or without the overrides.
+    """
+
+    def __init__(self, inner: BaseAdapter, route: Callable[[str], str]) -> None:
+        super().__init__()
+        self.inner = inner
+        self.route = route
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        url = self.route(request.url or "")
+        if url != request.url:
+            request = request.copy()
+            request.url = url
+        return self.inner.send(request, **kwargs)
+
+    def close(self) -> None:
+        self.inner.close()
+
+
+def route_adapters(session: requests.Session, route: Callable[[str], str]) -> None:
+    """Wrap every adapter mounted on session in a RoutingAdapter."""
+    for prefix, adapter in list(session.adapters.items()):
+        session.mount(prefix, RoutingAdapter(adapter, route))
+
+
+def mount_adapters(session: requests.Session, transport: TransportConfig) -> None:
+    """Mount tuned adapters for all URLs, per-host pools from host_pool_maxsize and HTTP/2 for http2_hosts."""
+    options = socket_options(transport)
+
+    def adapter(maxsize: int) -> TunedHTTPAdapter:
+        return TunedHTTPAdapter(
+            options,
+            pool_connections=transport.pool_connections,
+            pool_maxsize=maxsize,
+            pool_block=transport.pool_block,
+        )
+
+    session.mount("https://", adapter(transport.pool_maxsize))
+    session.mount("http://", adapter(transport.pool_maxsize))
+    for host, maxsize in transport.host_pool_maxsize.items():
+        session.mount(f"https://{host}/", adapter(maxsize))
+    if transport.http2_hosts:
+        _mount_http2(session, transport, options)
+
+
+def _mount_http2(session: requests.Session, transport: TransportConfig, options: List[Tuple[int, int, int]]) -> None:
+    """One Http2Adapter shared by all http2_hosts (httpx keeps one connection per host); HTTP/1.1 if unavailable."""
+    try:
+        h2 = Http2Adapter(options, max_connections=transport.pool_connections * transport.pool_maxsize)
+    except (ImportError, RuntimeError) as e:
+        logger.warning("HTTP/2 unavailable (%s); staying on HTTP/1.1", e)
+        return
+    for host in transport.http2_hosts:
+        session.mount("https://" if host == "*" else f"https://{host}/", h2)
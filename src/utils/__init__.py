@@ -1,4 +1,6 @@
 from . import date
 from . import directory
+from . import json_codec
+from . import json_file
 
-__all__ = ["date", "directory"]
+__all__ = ["date", "directory", "json_codec", "json_file"]
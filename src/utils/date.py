@@ -1,15 +1,31 @@
-"""Date/time utilities for booking windows and timezone handling."""
-from datetime import datetime, timedelta
+"""
+Date/time utilities for booking windows and timezone handling.
+Hot-path helpers for availability slots: timezone objects are cached, slot dates and times are parsed
+with int() instead of strptime, and slot_start_local memoizes the UTC -> local conversion per
+(start_date, start_time) (see scripts/bench_date.py).
+"""
+from datetime import datetime, timedelta, tzinfo
+from functools import lru_cache
 
 import pytz
 import tzlocal
 
+# Distinct (start_date, start_time) pairs kept by slot_start_local (21 days x 48 half hours fit many times over)
+SLOT_CACHE_SIZE = 8192
 
+
+@lru_cache(maxsize=1)
 def get_local_timezone() -> str:
-    """Get system's local timezone name."""
+    """Get system's local timezone name (looked up once per process)."""
     return tzlocal.get_localzone_name()
 
 
+@lru_cache(maxsize=None)
+def get_timezone(name: str) -> tzinfo:
+    """pytz timezone for name, built once per name."""
+    return pytz.timezone(name)
+
+
 def set_start_of_day(dt: datetime) -> datetime:
     """Set the start of the day for the provided date."""
     return dt.replace(hour=0, minute=0, second=0, microsecond=0)
@@ -33,8 +49,23 @@ def parse_datetime(hour: str, baseline: datetime) -> datetime:
 def parse_utc_to_local(utc_date: datetime) -> datetime:
     """Convert UTC datetime to local timezone."""
     utc_date = utc_date.replace(tzinfo=pytz.UTC)
-    local_tz = get_local_timezone()
-    return utc_date.astimezone(pytz.timezone(local_tz))
+    return utc_date.astimezone(get_timezone(get_local_timezone()))
+
+
+def parse_slot_start(start_date: str, start_time: str) -> datetime:
+    """Naive datetime from an availability start_date ('YYYY-MM-DD') and slot start_time ('HH:MM[:SS]')."""
+    year, month, day = start_date.split("-")
+    time_parts = start_time.split(":")
+    if not 2 <= len(time_parts) <= 3:
+        raise ValueError(f"Invalid slot time {start_time!r}")
+    second = int(time_parts[2]) if len(time_parts) == 3 else 0
+    return datetime(int(year), int(month), int(day), int(time_parts[0]), int(time_parts[1]), second)
+
+
+@lru_cache(maxsize=SLOT_CACHE_SIZE)
+def slot_start_local(start_date: str, start_time: str) -> datetime:
+    """Local start of a slot whose start_date/start_time are UTC; memoized (datetimes are immutable)."""
+    return parse_utc_to_local(parse_slot_start(start_date, start_time))
 
 
 def is_within_current_week(dt: datetime) -> bool:
@@ -18,3 +18,11 @@ def get_config_dir() -> Path:
 def get_config_path() -> Path:
     """Path to booking_config.yaml."""
     return get_config_dir() / "booking_config.yaml"
+
+
+def get_cache_dir() -> Path:
+    """Directory for run-to-run state such as cached sessions (project .cache/ or env PLAYTOMIC_CACHE_DIR)."""
+    env_path = os.environ.get("PLAYTOMIC_CACHE_DIR")
+    cache_dir = Path(env_path) if env_path else Path(__file__).resolve().parent.parent.parent / ".cache"
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
@@ -0,0 +1,36 @@
+"""JSON decoding with the fastest installed backend: orjson > ujson > stdlib json."""
+import json
+from typing import Any, Callable, Dict, Optional, Union
+
+Decoder = Callable[[Union[bytes, str]], Any]
+
+DECODERS: Dict[str, Decoder] = {"json": json.loads}
+
+try:
+    import orjson
+
+    DECODERS["orjson"] = orjson.loads
+except ImportError:  # optional
+    pass
+
+try:
+    import ujson
+
+    DECODERS["ujson"] = ujson.loads
+except ImportError:  # optional
+    pass
+
+BACKEND = next(name for name in ("orjson", "ujson", "json") if name in DECODERS)
+
+
+def get_decoder(name: Optional[str] = None) -> Decoder:
+    """Decoder by backend name ('orjson', 'ujson', 'json'); default is the fastest installed one.
+    Every decoder raises a ValueError subclass on invalid input, like json.loads."""
+    if name is None:
+        return DECODERS[BACKEND]
+    if name not in DECODERS:
+        raise ValueError(f"JSON backend {name!r} is not installed (available: {', '.join(sorted(DECODERS))})")
+    return DECODERS[name]
+
+
+loads: Decoder = get_decoder()
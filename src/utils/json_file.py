@@ -0,0 +1,38 @@
+"""Small JSON files for run-to-run state (sessions, payment backends, caches)."""
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+def read_json_dict(path: Path) -> Dict[str, Any]:
+    """Read a JSON object from path; missing or unreadable files give {}."""
+    if not path.exists():
+        return {}
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable file %s: %s", path, e)
+        return {}
+
+
+def write_private_json(path: Path, data: Dict[str, Any]) -> None:
+    """Atomically write data as JSON, readable by the owner only (files may hold tokens)."""
+    # Unique temp file (mkstemp creates it 0600), so concurrent writers never share or remove each other's
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
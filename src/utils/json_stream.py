@@ -0,0 +1,65 @@
+"""Incremental parsing of a top-level JSON array: yields each element as soon as it is complete."""
+import codecs
+import json
+from typing import Any, Iterable, Iterator
+
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Yield the elements of a JSON array body while it downloads (chunks = response.iter_content()).
+    A body that is valid JSON but not an array yields nothing (like the non-list case of fetch_availability);
+    anything that is not JSON raises ValueError (json.JSONDecodeError).
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf = ""
+    pos = 0
+    started = False
+    not_array = False
+    for chunk in chunks:
+        buf += utf8.decode(chunk)
+        if not_array:
+            continue
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos >= len(buf):
+                break
+            if not started:
+                if buf[pos] != "[":
+                    not_array = True
+                    break
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == ",":
+                pos += 1
+                continue
+            if buf[pos] == "]":
+                return
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                break  # element not complete yet: wait for more data
+            # A value is only complete once the next separator is visible (e.g. numbers split across chunks)
+            nxt = end
+            while nxt < len(buf) and buf[nxt] in _WHITESPACE:
+                nxt += 1
+            if nxt >= len(buf):
+                break
+            if buf[nxt] not in ",]":
+                if nxt == end and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    break  # number cut mid-way ("1500" of "1500.0"): wait for the rest
+                raise json.JSONDecodeError("Expecting ',' delimiter", buf, nxt)
+            yield value
+            pos = nxt
+        # Drop consumed text so the buffer only holds the element being downloaded
+        buf = buf[pos:]
+        pos = 0
+    buf += utf8.decode(b"", final=True)
+    # Body ended: either it was not an array, or the array is truncated/invalid
+    json.loads(buf)  # raises ValueError if this is not JSON at all
+    if not not_array and started:
+        raise json.JSONDecodeError("Unterminated JSON array", buf, len(buf))